@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from typing import Dict
+
+from aiohttp import web
+
+
+class FakeRoblox:
+    """Local stand-in for the users, presence, thumbnails and games endpoints.
+
+    Each host is served on its own port so the per-host rate limiter sees
+    four distinct hosts. `latency` is the mean response delay in seconds;
+    `rate_limit_rate` and `error_rate` are the fractions of requests answered
+    with 429 and 503.
+    """
+
+    def __init__(self, latency: float = 0.02, rate_limit_rate: float = 0.0, error_rate: float = 0.0, retry_after: float = 1):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.online: Dict[int, bool] = {}
+        self.flipped_at: Dict[int, float] = {}
+        self.requests: Dict[str, int] = {}
+        self.runner = None
+        self.base_urls: Dict[str, str] = {}
+
+    def set_online(self, user_id: int, online: bool):
+        self.online[user_id] = online
+        self.flipped_at[user_id] = time.monotonic()
+
+    def reset_counts(self):
+        self.requests = {}
+
+    async def _simulate(self, endpoint: str):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return web.json_response({'errors': [{'message': 'Too many requests'}]}, status=429, headers={'Retry-After': str(self.retry_after)})
+        if roll < self.rate_limit_rate + self.error_rate:
+            return web.json_response({'errors': [{'message': 'Service unavailable'}]}, status=503)
+        return None
+
+    def _user(self, user_id: int) -> dict:
+        return {'id': user_id, 'name': f'user{user_id}', 'displayName': f'User {user_id}', 'hasVerifiedBadge': False}
+
+    async def presence(self, request):
+        failure = await self._simulate('presence')
+        if failure:
+            return failure
+        payload = await request.json()
+        return web.json_response({'userPresences': [
+            {
+                'userPresenceType': 2 if self.online.get(user_id) else 0,
+                'lastLocation': 'Benchmark Place' if self.online.get(user_id) else '',
+                'placeId': 1818 if self.online.get(user_id) else None,
+                'rootPlaceId': 1818 if self.online.get(user_id) else None,
+                'gameId': None,
+                'universeId': 13058 if self.online.get(user_id) else None,
+                'userId': user_id,
+                'lastOnline': ''
+            }
+            for user_id in payload.get('userIds', [])
+        ]})
+
+    async def users(self, request):
+        failure = await self._simulate('users')
+        if failure:
+            return failure
+        payload = await request.json()
+        return web.json_response({'data': [self._user(user_id) for user_id in payload.get('userIds', [])]})
+
+    async def user(self, request):
+        failure = await self._simulate('user')
+        if failure:
+            return failure
+        return web.json_response(self._user(int(request.match_info['user_id'])))
+
+    async def avatars(self, request):
+        failure = await self._simulate('avatars')
+        if failure:
+            return failure
+        user_ids = [int(user_id) for user_id in request.query.get('userIds', '').split(',') if user_id]
+        return web.json_response({'data': [
+            {'targetId': user_id, 'state': 'Completed', 'imageUrl': f'https://tr.rbxcdn.com/benchmark/{user_id}.png'}
+            for user_id in user_ids
+        ]})
+
+    def _universe_ids(self, request) -> list:
+        return [int(universe_id) for universe_id in request.query.get('universeIds', '').split(',') if universe_id]
+
+    async def games(self, request):
+        failure = await self._simulate('games')
+        if failure:
+            return failure
+        return web.json_response({'data': [
+            {'id': universe_id, 'rootPlaceId': 1818, 'name': f'Benchmark Game {universe_id}'}
+            for universe_id in self._universe_ids(request)
+        ]})
+
+    async def game_icons(self, request):
+        failure = await self._simulate('game_icons')
+        if failure:
+            return failure
+        return web.json_response({'data': [
+            {'targetId': universe_id, 'state': 'Completed', 'imageUrl': f'https://tr.rbxcdn.com/benchmark/game-{universe_id}.png'}
+            for universe_id in self._universe_ids(request)
+        ]})
+
+    async def start(self, host: str = '127.0.0.1'):
+        app = web.Application()
+        app.router.add_post('/v1/presence/users', self.presence)
+        app.router.add_post('/v1/users', self.users)
+        app.router.add_get('/v1/users/avatar', self.avatars)
+        app.router.add_get('/v1/users/{user_id}', self.user)
+        app.router.add_get('/v1/games', self.games)
+        app.router.add_get('/v1/games/icons', self.game_icons)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        for name in ('users', 'presence', 'thumbnails', 'games'):
+            site = web.TCPSite(self.runner, host, 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.base_urls[name] = f'http://{host}:{port}'
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from pymongo.errors import OperationFailure
+
+PROFILE_LINK = re.compile(r'users/(\d+)/profile')
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and '$in' in condition:
+            if value not in condition['$in']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(doc)
+    result = {field: doc[field] for field, include in projection.items() if include and field in doc}
+    if projection.get('_id', 1) and '_id' in doc:
+        result['_id'] = doc['_id']
+    return result
+
+
+class FakeCursor:
+    def __init__(self, docs: List[dict], latency: float = 0.0):
+        self.docs = docs
+        self.latency = latency
+
+    def sort(self, key: str, direction: int = 1):
+        self.docs.sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        return self
+
+    def skip(self, count: int):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    async def _iterate(self):
+        for index, doc in enumerate(self.docs):
+            # Yield to the loop once per server batch, as Motor does between getMore calls
+            if index % 1000 == 0:
+                await asyncio.sleep(self.latency)
+            yield doc
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def to_list(self, length: Optional[int] = None):
+        await asyncio.sleep(self.latency)
+        return self.docs[:length] if length else list(self.docs)
+
+
+class FakeCollection:
+    """In-memory stand-in for the subset of the Motor collection API the bot uses.
+
+    guild_id and roblox_id are indexed so lookups scale the way they do
+    against a real indexed collection.
+    """
+
+    indexed_fields = ('guild_id', 'roblox_id')
+
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.docs: Dict[int, dict] = {}
+        self.indexes: Dict[str, Dict[object, set]] = {field: {} for field in self.indexed_fields}
+        self.ops: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    async def _round_trip(self, operation: str):
+        self.ops[operation] = self.ops.get(operation, 0) + 1
+        await asyncio.sleep(self.latency)
+
+    def reset_counts(self):
+        self.ops = {}
+
+    def _index(self, doc: dict):
+        for field in self.indexed_fields:
+            if field in doc:
+                self.indexes[field].setdefault(doc[field], set()).add(doc['_id'])
+
+    def _unindex(self, doc: dict):
+        for field in self.indexed_fields:
+            if field in doc:
+                self.indexes[field].get(doc[field], set()).discard(doc['_id'])
+
+    def _candidates(self, query: dict) -> List[dict]:
+        for field in self.indexed_fields:
+            condition = query.get(field)
+            if condition is None:
+                continue
+            values = condition['$in'] if isinstance(condition, dict) else [condition]
+            doc_ids = set()
+            for value in values:
+                doc_ids |= self.indexes[field].get(value, set())
+            return [self.docs[doc_id] for doc_id in sorted(doc_ids)]
+        return list(self.docs.values())
+
+    def _find(self, query: dict) -> List[dict]:
+        return [doc for doc in self._candidates(query) if _matches(doc, query)]
+
+    def insert_many_sync(self, docs: List[dict]):
+        for doc in docs:
+            doc = dict(doc)
+            doc['_id'] = next(self._ids)
+            self.docs[doc['_id']] = doc
+            self._index(doc)
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> FakeCursor:
+        self.ops['find'] = self.ops.get('find', 0) + 1
+        return FakeCursor([_project(doc, projection) for doc in self._find(query or {})], self.latency)
+
+    async def find_one(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        await self._round_trip('find_one')
+        docs = self._find(query)
+        return _project(docs[0], projection) if docs else None
+
+    async def count_documents(self, query: dict) -> int:
+        await self._round_trip('count_documents')
+        return len(self._find(query))
+
+    def _update(self, query: dict, update: dict, upsert: bool = False) -> int:
+        docs = self._find(query)
+        if docs:
+            doc = docs[0]
+            self._unindex(doc)
+            doc.update(update.get('$set', {}))
+            self._index(doc)
+            return 1
+        if upsert:
+            doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+            doc.update(update.get('$setOnInsert', {}))
+            doc.update(update.get('$set', {}))
+            self.insert_many_sync([doc])
+        return 0
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        await self._round_trip('update_one')
+        return SimpleNamespace(modified_count=self._update(query, update, upsert))
+
+    async def delete_one(self, query: dict):
+        await self._round_trip('delete_one')
+        docs = self._find(query)
+        if docs:
+            self._unindex(docs[0])
+            del self.docs[docs[0]['_id']]
+        return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        await self._round_trip('bulk_write')
+        modified = 0
+        upserted = 0
+        for operation in operations:
+            # pymongo UpdateOne keeps its arguments in private attributes
+            before = len(self.docs)
+            modified += self._update(operation._filter, operation._doc, getattr(operation, '_upsert', False))
+            upserted += len(self.docs) - before
+        return SimpleNamespace(modified_count=modified, upserted_count=upserted)
+
+    async def create_index(self, keys, **kwargs):
+        await self._round_trip('create_index')
+        return kwargs.get('name')
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets")
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, channel: 'FakeChannel'):
+        self.id = message_id
+        self.channel = channel
+
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        await self.channel._record('edit', embed)
+        return self
+
+    async def delete(self):
+        await self.channel._record('delete', None)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, discord: 'FakeDiscord'):
+        self.id = channel_id
+        self.discord = discord
+
+    async def _record(self, operation: str, embed):
+        await asyncio.sleep(self.discord.latency)
+        user_id = None
+        if embed is not None and embed.description:
+            match = PROFILE_LINK.search(embed.description)
+            if match:
+                user_id = int(match.group(1))
+        self.discord.events.append((operation, self.id, user_id, time.monotonic()))
+
+    async def send(self, content=None, embed=None, view=None, embeds=None, **kwargs):
+        for item in embeds or [embed]:
+            await self._record('send', item)
+        return FakeMessage(next(self.discord.message_ids), self)
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(message_id, self)
+
+
+class FakeDiscord:
+    """Records every send/edit as (operation, channel_id, roblox_user_id, monotonic time)."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.channels: Dict[int, FakeChannel] = {}
+        self.events = []
+        self.message_ids = itertools.count(10 ** 17)
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeChannel(channel_id, self)
+        return channel
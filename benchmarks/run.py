@@ -0,0 +1,164 @@
+"""Offline throughput benchmark for RobloxAPI and the check_players pipeline.
+
+Runs full poll sweeps against local stand-ins for Roblox (aiohttp server),
+MongoDB (in-memory collections) and Discord (recording fake channels), and
+reports cycle time, upstream requests per cycle and transition-to-notification
+latency. Run from the repository root:
+
+    python -m benchmarks.run --sizes 100 1000 10000 100000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+import bot
+from player_state import PlayerStateTable
+from roblox_api import RobloxAPI
+from settings_cache import GuildSettingsCache
+from write_buffer import TrackedPlayerWriteBuffer
+
+from benchmarks.fake_roblox import FakeRoblox
+from benchmarks.fakes import FakeCollection, FakeDiscord
+
+CHANNEL_ID_BASE = 9 * 10 ** 17
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def install_fakes(roblox: FakeRoblox, discord: FakeDiscord, args) -> FakeCollection:
+    tracked = FakeCollection('tracked_players', latency=args.mongo_latency)
+    settings = FakeCollection('guild_settings', latency=args.mongo_latency)
+    settings.insert_many_sync([
+        {'guild_id': str(guild), 'notification_channel_id': CHANNEL_ID_BASE + guild}
+        for guild in range(args.guilds)
+    ])
+
+    api = RobloxAPI(base_urls=roblox.base_urls)
+    for base_url in roblox.base_urls.values():
+        api.host_rate_limits[base_url.split('://', 1)[1]] = (args.rate, args.rate)
+
+    bot.tracked_players = tracked
+    bot.guild_settings = settings
+    bot.guild_settings_cache = GuildSettingsCache(settings)
+    bot.player_writes = TrackedPlayerWriteBuffer(tracked)
+    bot.player_state = PlayerStateTable(tracked, bot.POLL_PROJECTION)
+    bot.roblox_api = api
+    bot.channel_cache.clear()
+    bot.client.get_channel = discord.get_channel
+    return tracked
+
+
+def seed_players(tracked: FakeCollection, roblox: FakeRoblox, size: int, args) -> List[str]:
+    users = max(1, size // args.fanout)
+    user_ids = [str(1_000_000 + index) for index in range(users)]
+    docs = []
+    for index in range(size):
+        user_index = index % users
+        user_id = user_ids[user_index]
+        # Each of a user's rows lands in a different guild while fanout <= guilds
+        guild = (user_index + index // users) % args.guilds
+        docs.append({
+            'guild_id': str(guild),
+            'roblox_id': user_id,
+            'username': f'user{user_id}',
+            'display_name': f'User {user_id}',
+            'last_status': 'offline'
+        })
+    tracked.insert_many_sync(docs)
+    for user_id in user_ids:
+        roblox.online[int(user_id)] = False
+    return user_ids
+
+
+async def run_size(size: int, args) -> dict:
+    roblox = FakeRoblox(latency=args.roblox_latency, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate)
+    discord = FakeDiscord(latency=args.discord_latency)
+    await roblox.start()
+    tracked = install_fakes(roblox, discord, args)
+    user_ids = seed_players(tracked, roblox, size, args)
+    await bot.player_state.load()
+
+    cycle_times = []
+    requests = []
+    mongo_ops = []
+    latencies = []
+    try:
+        for _ in range(args.cycles):
+            for user_id in random.sample(user_ids, max(1, int(len(user_ids) * args.flip_rate))):
+                roblox.set_online(int(user_id), not roblox.online[int(user_id)])
+            # Presence would have expired between real cycles
+            bot.roblox_api.clear_cache('presence')
+            roblox.reset_counts()
+            tracked.reset_counts()
+            discord.events = []
+
+            start = time.perf_counter()
+            bot.roblox_api.start_cycle()
+            bot.tracer.start_cycle()
+            with bot.tracer.span('cycle', players=len(user_ids)):
+                await bot.poll_pipeline.run(bot.iter_player_batches(user_ids))
+                await bot.player_writes.flush()
+            cycle_times.append(time.perf_counter() - start)
+            # Notifications are delivered off the poll path; wait for them before reading latencies
+            await bot.notifications.join()
+            await bot.player_writes.flush()
+            await bot.tracer.end_cycle()
+
+            requests.append(sum(roblox.requests.values()))
+            mongo_ops.append(sum(tracked.ops.values()))
+            latencies.extend(
+                event_time - roblox.flipped_at[user_id]
+                for operation, channel_id, user_id, event_time in discord.events
+                if user_id in roblox.flipped_at
+            )
+    finally:
+        await bot.roblox_api.close_session()
+        await roblox.stop()
+
+    return {
+        'size': size,
+        'cycle_time': sum(cycle_times) / len(cycle_times),
+        'requests': sum(requests) / len(requests),
+        'mongo_ops': sum(mongo_ops) / len(mongo_ops),
+        'notifications': len(latencies),
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000], help='tracked player rows per run')
+    parser.add_argument('--cycles', type=int, default=3, help='poll sweeps per size')
+    parser.add_argument('--fanout', type=int, default=1, help='guilds tracking each Roblox user')
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--flip-rate', type=float, default=0.02, help='fraction of users changing status before each cycle')
+    parser.add_argument('--rate', type=float, default=1000, help='requests per second allowed per fake Roblox host')
+    parser.add_argument('--roblox-latency', type=float, default=0.02)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of Roblox requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of Roblox requests answered with 503')
+    parser.add_argument('--discord-latency', type=float, default=0.05)
+    parser.add_argument('--mongo-latency', type=float, default=0.002)
+    parser.add_argument('--trace', help='write a Chrome trace of every cycle to this file')
+    args = parser.parse_args()
+    bot.tracer.configure(args.trace)
+
+    print(f"{'players':>8} {'cycle s':>9} {'req/cycle':>10} {'mongo/cycle':>12} {'notifs':>7} {'p50 s':>8} {'p99 s':>8}", flush=True)
+    for size in args.sizes:
+        result = await run_size(size, args)
+        print(
+            f"{result['size']:>8} {result['cycle_time']:>9.2f} {result['requests']:>10.0f} {result['mongo_ops']:>12.0f} "
+            f"{result['notifications']:>7} {result['p50']:>8.3f} {result['p99']:>8.3f}",
+            flush=True
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
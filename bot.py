@@ -2,11 +2,28 @@ import discord
 from discord import app_commands
 from discord.ext import tasks
 import os
+import re
 import asyncio
+import hashlib
+import json
+import socket
+import time
 from datetime import datetime
 from roblox_api import RobloxAPI
+from pipeline import Pipeline, Stage
+from settings_cache import GuildSettingsCache
+from write_buffer import TrackedPlayerWriteBuffer
+from player_state import PlayerStateTable
+from scheduler import PollScheduler
+from metrics import registry
+from tracing import tracer
+from persistent_cache import MongoCacheStore
+from notification_queue import NotificationDispatcher
+from sharding import ShardCoordinator
 from aiohttp import web
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -29,9 +46,65 @@ except Exception:
 
 guild_settings = db.guild_settings
 tracked_players = db.tracked_players
+bot_state = db.bot_state
+guild_settings_cache = GuildSettingsCache(guild_settings)
+player_writes = TrackedPlayerWriteBuffer(tracked_players)
+
+# Persist user info, avatars and games across restarts; presence is too short-lived to be worth it
+if os.getenv('PERSISTENT_CACHE', 'true').lower() != 'false':
+    roblox_api.persistent_store = MongoCacheStore(db.roblox_cache, cache_types=('user_info', 'avatar', 'game'))
 
 OWNER_USER_ID = 1117540437016727612
 
+# all: gateway + polling in one process; gateway: commands only; poller: polling only (REST login, no gateway)
+BOT_ROLE = os.getenv('BOT_ROLE', 'all')
+# Split polling across every process with POLL_SHARDING=true, each owning a share of roblox_ids
+POLL_SHARDING = os.getenv('POLL_SHARDING', 'false').lower() == 'true' or BOT_ROLE == 'poller'
+NODE_ID = os.getenv('NODE_ID', f"{socket.gethostname()}-{os.getpid()}")
+
+# Poll pipeline tuning: concurrent workers per stage and the bound on each inter-stage queue
+POLL_STAGE_WORKERS = {
+    'presence': int(os.getenv('POLL_PRESENCE_WORKERS', 4)),
+    'detect': int(os.getenv('POLL_DETECT_WORKERS', 1)),
+    'notify': int(os.getenv('POLL_NOTIFY_WORKERS', 8)),
+    'persist': int(os.getenv('POLL_PERSIST_WORKERS', 4))
+}
+POLL_QUEUE_SIZE = int(os.getenv('POLL_QUEUE_SIZE', 500))
+PRESENCE_BATCH_SIZE = 50
+# Global poll budget in presence requests per second; each request covers PRESENCE_BATCH_SIZE users
+POLL_BUDGET_RPS = float(os.getenv('POLL_BUDGET_RPS', 2))
+if POLL_BUDGET_RPS <= 0:
+    raise ValueError(f"POLL_BUDGET_RPS must be positive, got {POLL_BUDGET_RPS}")
+# Only the fields the poll loop reads
+POLL_PROJECTION = {"_id": 0, "guild_id": 1, "roblox_id": 1, "last_status": 1, "message_id": 1, "display_name": 1}
+# Poll cycles read tracked players from here; Mongo is loaded once and then only written
+player_state = PlayerStateTable(tracked_players, POLL_PROJECTION)
+
+# Keeps presence requests full: users due within 10s fill a batch, a partial batch waits at most 5s
+poll_scheduler = PollScheduler(budget_per_second=POLL_BUDGET_RPS * PRESENCE_BATCH_SIZE, batch_size=PRESENCE_BATCH_SIZE, lookahead=10, slack=5)
+notifications = NotificationDispatcher(max_concurrency=int(os.getenv('NOTIFY_CHANNEL_CONCURRENCY', 10)))
+shard_coordinator = None
+
+# /health reports degraded once the poll loop has not completed a cycle for this long
+HEALTH_STALE_SECONDS = float(os.getenv('HEALTH_STALE_SECONDS', 120))
+
+# Opt-in span tracing of poll cycles, written as rotating Chrome trace files; off unless POLL_TRACE_FILE is set
+tracer.configure(
+    os.getenv('POLL_TRACE_FILE'),
+    max_bytes=int(os.getenv('POLL_TRACE_MAX_BYTES', 50_000_000)),
+    backups=int(os.getenv('POLL_TRACE_BACKUPS', 5))
+)
+last_cycle_completed = time.monotonic()
+
+cycle_duration = registry.histogram('poll_cycle_duration_seconds', 'Duration of poll cycles that had due players', buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+players_polled = registry.gauge('poll_players_per_cycle', 'Roblox users polled in the last cycle')
+players_polled_total = registry.counter('poll_players_total', 'Roblox users polled since startup')
+discord_latency = registry.histogram('discord_request_duration_seconds', 'Discord REST call latency', ['operation'])
+mongo_latency = registry.histogram('mongo_operation_duration_seconds', 'MongoDB operation latency', ['operation'])
+cache_hit_ratio = registry.gauge('roblox_cache_hit_ratio', 'RobloxAPI cache hit ratio since startup', ['cache_type'])
+cache_size = registry.gauge('roblox_cache_entries', 'Entries currently held in the RobloxAPI cache', ['cache_type'])
+notification_backlog = registry.gauge('discord_notification_backlog', 'Notifications queued for delivery')
+
 @tree.command(name="add-player", description="Add a Roblox player to track by their user ID")
 @app_commands.describe(roblox_id="The Roblox user ID (Profile ID) to track")
 async def add_player(interaction: discord.Interaction, roblox_id: str):
@@ -57,114 +130,341 @@ async def add_player(interaction: discord.Interaction, roblox_id: str):
     
     guild_id = str(interaction.guild_id)
     
-    await tracked_players.update_one(
-        {"guild_id": guild_id, "roblox_id": str(user_id)},
-        {
-            "$set": {
-                "username": user_info['name'],
-                "display_name": user_info['displayName'],
-                "added_at": datetime.utcnow().isoformat(),
-                "last_status": "offline"
-            }
-        },
-        upsert=True
-    )
+    with mongo_latency.time(operation='add_player'):
+        await tracked_players.update_one(
+            {"guild_id": guild_id, "roblox_id": str(user_id)},
+            {
+                "$set": {
+                    "username": user_info.name,
+                    "display_name": user_info.display_name,
+                    "added_at": datetime.utcnow().isoformat(),
+                    "last_status": "offline"
+                }
+            },
+            upsert=True
+        )
+    player_state.upsert(guild_id, str(user_id), {"display_name": user_info.display_name, "last_status": "offline"})
+    poll_scheduler.add(str(user_id))
     
     embed = discord.Embed(
-        description=f"✅ Now tracking **{user_info['displayName']}** (@{user_info['name']})\n Profile ID: `{user_id}`",
+        description=f"✅ Now tracking **{user_info.display_name}** (@{user_info.name})\n Profile ID: `{user_id}`",
         color=0xFFFFFF
     )
     
     await interaction.response.send_message(embed=embed)
 
-@tree.command(name="list-tracked", description="Shows all tracked players with a dropdown menu")
-async def list_tracked(interaction: discord.Interaction):
+IMPORT_MAX_ENTRIES = 1000
+IMPORT_MAX_FILE_BYTES = 256 * 1024
+ROBLOX_USERNAME = re.compile(r"^[A-Za-z0-9_]{3,20}$")
+
+def parse_import_entries(text: str):
+    # Accepts IDs and usernames separated by commas, semicolons or whitespace, in any mix
+    user_ids, usernames, invalid = [], [], []
+    seen = set()
+    for entry in re.split(r"[\s,;]+", text):
+        entry = entry.strip().lstrip('@')
+        if not entry or entry.lower() in seen:
+            continue
+        seen.add(entry.lower())
+        # isdigit() alone accepts characters like '²' that int() rejects
+        if entry.isascii() and entry.isdigit():
+            user_ids.append(int(entry))
+        elif ROBLOX_USERNAME.match(entry):
+            usernames.append(entry)
+        else:
+            invalid.append(entry)
+    return user_ids, usernames, invalid
+
+def format_import_failures(failures: list, limit: int) -> str:
+    lines = []
+    length = 0
+    for index, (entry, reason) in enumerate(failures):
+        line = f"• `{entry}` - {reason}"
+        if length + len(line) + 1 > limit:
+            lines.append(f"…and {len(failures) - index} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+async def run_player_import(interaction: discord.Interaction, players: str, file: discord.Attachment):
+    text = players or ""
+    if file:
+        text += "\n" + (await file.read()).decode('utf-8', errors='ignore')
+    
+    user_ids, usernames, invalid = parse_import_entries(text)
+    failures = [(entry, "not a valid ID or username") for entry in invalid]
+    
+    if len(user_ids) + len(usernames) > IMPORT_MAX_ENTRIES:
+        embed = discord.Embed(
+            description=f"❌ Too many players in one import (max {IMPORT_MAX_ENTRIES}).",
+            color=0xFFFFFF
+        )
+        await interaction.followup.send(embed=embed)
+        return
+    
+    # Both lookups go through the multi-user endpoints in batches of 100
+    infos_by_id, infos_by_name = await asyncio.gather(
+        roblox_api.get_multiple_user_infos(user_ids),
+        roblox_api.get_users_by_usernames(usernames)
+    )
+    
+    resolved = {}
+    for user_id in user_ids:
+        if user_id not in infos_by_id:
+            failures.append((str(user_id), "lookup failed, please retry"))
+        elif infos_by_id[user_id] is None:
+            failures.append((str(user_id), "no Roblox user with this ID"))
+        else:
+            resolved[user_id] = infos_by_id[user_id]
+    for username in usernames:
+        if username.lower() not in infos_by_name:
+            failures.append((username, "lookup failed, please retry"))
+        elif infos_by_name[username.lower()] is None:
+            failures.append((username, "no Roblox user with this username"))
+        else:
+            user_info = infos_by_name[username.lower()]
+            resolved[user_info.id] = user_info
+    
     guild_id = str(interaction.guild_id)
+    user_infos = list(resolved.values())
+    added_at = datetime.utcnow().isoformat()
+    # Existing rows keep their status and notification message so a re-import does not re-announce anyone
+    operations = [
+        UpdateOne(
+            {"guild_id": guild_id, "roblox_id": str(user_info.id)},
+            {
+                "$set": {"username": user_info.name, "display_name": user_info.display_name},
+                "$setOnInsert": {"added_at": added_at, "last_status": "offline"}
+            },
+            upsert=True
+        )
+        for user_info in user_infos
+    ]
     
-    cursor = tracked_players.find({"guild_id": guild_id})
-    players = await cursor.to_list(length=100)
+    failed_indexes = set()
+    added = updated = 0
+    if operations:
+        try:
+            with mongo_latency.time(operation='import_players'):
+                result = await tracked_players.bulk_write(operations, ordered=False)
+            added, updated = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            # Unordered: every operation was attempted, only the reported ones failed
+            added, updated = e.details.get('nUpserted', 0), e.details.get('nMatched', 0)
+            for error in e.details.get('writeErrors', []):
+                failed_indexes.add(error['index'])
+                failures.append((str(user_infos[error['index']].id), "could not be saved"))
+        except PyMongoError as e:
+            print(f"Failed to import players for guild {guild_id}: {e}")
+            embed = discord.Embed(description="❌ Could not save the imported players. Please try again.", color=0xFFFFFF)
+            await interaction.followup.send(embed=embed)
+            return
     
-    if not players:
+    for index, user_info in enumerate(user_infos):
+        if index in failed_indexes:
+            continue
+        roblox_id = str(user_info.id)
+        fields = {"display_name": user_info.display_name}
+        if player_state.get(guild_id, roblox_id) is None:
+            fields["last_status"] = "offline"
+        player_state.upsert(guild_id, roblox_id, fields)
+        poll_scheduler.add(roblox_id)
+    
+    summary = f"✅ Imported **{added}** new player(s)"
+    if updated:
+        summary += f", **{updated}** already tracked"
+    summary += "."
+    if failures:
+        summary += f"\n\n**{len(failures)} entr{'y' if len(failures) == 1 else 'ies'} could not be imported:**\n"
+        summary += format_import_failures(failures, 4096 - len(summary) - 32)
+    
+    embed = discord.Embed(description=summary, color=0xFFFFFF)
+    await interaction.followup.send(embed=embed)
+
+@tree.command(name="import-players", description="Track many Roblox players at once by ID or username")
+@app_commands.describe(
+    players="Roblox user IDs and/or usernames separated by spaces, commas or new lines",
+    file="A text file with one Roblox user ID or username per line"
+)
+async def import_players(interaction: discord.Interaction, players: str = None, file: discord.Attachment = None):
+    if not players and not file:
         embed = discord.Embed(
-            description="📋 No players are currently being tracked.\nUse `/add-player <roblox_id>` to start tracking players.",
+            description="❌ Provide a list of Roblox IDs or usernames, or attach a file containing them.",
             color=0xFFFFFF
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    class PlayerSelect(discord.ui.Select):
-        def __init__(self, players, guild_id):
-            self.guild_id = guild_id
-            options = [
-                discord.SelectOption(
-                    label=f"{p['display_name']} (@{p['username']})",
-                    description=f"ID: {p['roblox_id']} - Click to remove",
-                    value=p['roblox_id']
-                )
-                for p in players
-            ]
-            super().__init__(placeholder="Select a player to remove from tracking", options=options, min_values=1, max_values=1)
-        
-        async def callback(self, interaction: discord.Interaction):
-            selected_id = self.values[0]
-            
-            player_data = await tracked_players.find_one({"guild_id": self.guild_id, "roblox_id": selected_id})
-            
-            if player_data:
-                # Delete old message if exists
-                if player_data.get('message_id'):
-                    settings = await guild_settings.find_one({"guild_id": self.guild_id})
-                    if settings and settings.get('notification_channel_id'):
-                        try:
-                            channel = await client.fetch_channel(settings['notification_channel_id'])
-                            msg = await channel.fetch_message(player_data['message_id'])
-                            await msg.delete()
-                        except:
-                            pass
-                
-                # Remove from tracking
-                await tracked_players.delete_one({"guild_id": self.guild_id, "roblox_id": selected_id})
-                
-                embed = discord.Embed(
-                    description=f"✅ Removed **{player_data['display_name']}** (@{player_data['username']}) from tracking.",
-                    color=0xFFFFFF
-                )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-            else:
-                embed = discord.Embed(
-                    description="❌ Player not found in tracking list.",
-                    color=0xFFFFFF
-                )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+    if file and file.size > IMPORT_MAX_FILE_BYTES:
+        embed = discord.Embed(
+            description=f"❌ The attached file is too large (max {IMPORT_MAX_FILE_BYTES // 1024} KB).",
+            color=0xFFFFFF
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
     
-    class PlayerView(discord.ui.View):
-        def __init__(self, players, guild_id):
-            super().__init__()
-            self.add_item(PlayerSelect(players, guild_id))
+    # Validation can take a few round trips; acknowledge within Discord's 3s window first
+    await interaction.response.defer(thinking=True)
     
+    try:
+        await run_player_import(interaction, players, file)
+    except Exception as e:
+        # The interaction is deferred, so without a follow-up it would show "thinking…" forever
+        print(f"Failed to import players for guild {interaction.guild_id}: {e}")
+        embed = discord.Embed(description="❌ The import failed unexpectedly. Please try again.", color=0xFFFFFF)
+        await interaction.followup.send(embed=embed)
+
+# Discord allows at most 25 options per select, so one page fills one select
+TRACKED_PAGE_SIZE = 25
+TRACKED_LIST_PROJECTION = {"_id": 0, "roblox_id": 1, "display_name": 1, "username": 1}
+
+async def load_tracked_page(guild_id: str, page: int):
+    # Walks the (guild_id, roblox_id) index; one extra row tells whether a next page exists
+    cursor = tracked_players.find({"guild_id": guild_id}, projection=TRACKED_LIST_PROJECTION)
+    cursor = cursor.sort([("guild_id", ASCENDING), ("roblox_id", ASCENDING)]).skip(page * TRACKED_PAGE_SIZE).limit(TRACKED_PAGE_SIZE + 1)
+    with mongo_latency.time(operation='list_players'):
+        players = await cursor.to_list(length=TRACKED_PAGE_SIZE + 1)
+    return players[:TRACKED_PAGE_SIZE], len(players) > TRACKED_PAGE_SIZE
+
+def build_tracked_embed(players: list, page: int) -> discord.Embed:
     player_list = "\n".join([
-        f"• **{p['display_name']}** (@{p['username']}) - ID: `{p['roblox_id']}`"
+        f"• **{p.get('display_name', 'Unknown')}** (@{p.get('username', 'unknown')}) - ID: `{p['roblox_id']}`"
         for p in players
     ])
+    footer = "\n\n**Select a player below to remove them from tracking:**"
+    # Embed descriptions are capped at 4096 characters
+    if len(player_list) + len(footer) > 4096:
+        player_list = player_list[:4096 - len(footer) - 1] + "…"
     
     embed = discord.Embed(
         title="📋 Tracked Players",
-        description=f"{player_list}\n\n**Select a player below to remove them from tracking:**",
+        description=f"{player_list}{footer}",
         color=0xFFFFFF
     )
+    embed.set_footer(text=f"Page {page + 1}")
+    return embed
+
+class PlayerSelect(discord.ui.Select):
+    def __init__(self, players, guild_id):
+        self.guild_id = guild_id
+        options = [
+            discord.SelectOption(
+                label=f"{p.get('display_name', 'Unknown')} (@{p.get('username', 'unknown')})"[:100],
+                description=f"ID: {p['roblox_id']} - Click to remove",
+                value=p['roblox_id']
+            )
+            for p in players
+        ]
+        super().__init__(placeholder="Select a player to remove from tracking", options=options, min_values=1, max_values=1)
     
-    await interaction.response.send_message(embed=embed, view=PlayerView(players, guild_id), ephemeral=True)
+    async def callback(self, interaction: discord.Interaction):
+        selected_id = self.values[0]
+        
+        with mongo_latency.time(operation='find_player'):
+            player_data = await tracked_players.find_one(
+                {"guild_id": self.guild_id, "roblox_id": selected_id},
+                projection={"_id": 0, "display_name": 1, "username": 1, "message_id": 1}
+            )
+        
+        if player_data:
+            # Delete old message if exists
+            if player_data.get('message_id'):
+                settings = await guild_settings_cache.get(self.guild_id)
+                if settings and settings.get('notification_channel_id'):
+                    try:
+                        channel = await resolve_channel(settings['notification_channel_id'])
+                        await channel.get_partial_message(player_data['message_id']).delete()
+                    except (discord.Forbidden, discord.NotFound) as e:
+                        invalidate_channel_on_error(settings['notification_channel_id'], e)
+                    except:
+                        pass
+            
+            # Remove from tracking
+            with mongo_latency.time(operation='remove_player'):
+                await tracked_players.delete_one({"guild_id": self.guild_id, "roblox_id": selected_id})
+            player_state.remove(self.guild_id, selected_id)
+            
+            embed = discord.Embed(
+                description=f"✅ Removed **{player_data['display_name']}** (@{player_data['username']}) from tracking.",
+                color=0xFFFFFF
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        else:
+            embed = discord.Embed(
+                description="❌ Player not found in tracking list.",
+                color=0xFFFFFF
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+class TrackedPlayersView(discord.ui.View):
+    """One page of a guild's tracked players with prev/next buttons and a removal select."""
+    
+    def __init__(self, players, guild_id, page, has_next):
+        super().__init__()
+        self.guild_id = guild_id
+        self.page = page
+        self.previous_page.disabled = page == 0
+        self.next_page.disabled = not has_next
+        self.add_item(PlayerSelect(players, guild_id))
+    
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        players, has_next = await load_tracked_page(self.guild_id, page)
+        # Rows removed since the last page was shown can leave this page empty
+        while not players and page > 0:
+            page -= 1
+            players, has_next = await load_tracked_page(self.guild_id, page)
+        
+        if not players:
+            embed = discord.Embed(description="📋 No players are currently being tracked.", color=0xFFFFFF)
+            await interaction.response.edit_message(embed=embed, view=None)
+            return
+        
+        await interaction.response.edit_message(
+            embed=build_tracked_embed(players, page),
+            view=TrackedPlayersView(players, self.guild_id, page, has_next)
+        )
+    
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, max(0, self.page - 1))
+    
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
+
+@tree.command(name="list-tracked", description="Shows all tracked players with a dropdown menu")
+async def list_tracked(interaction: discord.Interaction):
+    guild_id = str(interaction.guild_id)
+    
+    players, has_next = await load_tracked_page(guild_id, 0)
+    
+    if not players:
+        embed = discord.Embed(
+            description="📋 No players are currently being tracked.\nUse `/add-player <roblox_id>` to start tracking players.",
+            color=0xFFFFFF
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    await interaction.response.send_message(
+        embed=build_tracked_embed(players, 0),
+        view=TrackedPlayersView(players, guild_id, 0, has_next),
+        ephemeral=True
+    )
 
 @tree.command(name="set-channel", description="Sets where notifications are sent")
 @app_commands.describe(channel="The channel to send notifications to")
 async def set_channel(interaction: discord.Interaction, channel: discord.TextChannel):
     guild_id = str(interaction.guild_id)
     
-    await guild_settings.update_one(
-        {"guild_id": guild_id},
-        {"$set": {"notification_channel_id": channel.id}},
-        upsert=True
-    )
+    with mongo_latency.time(operation='set_channel'):
+        await guild_settings.update_one(
+            {"guild_id": guild_id},
+            {"$set": {"notification_channel_id": channel.id}},
+            upsert=True
+        )
+    guild_settings_cache.update(guild_id, {"notification_channel_id": channel.id})
     
     embed = discord.Embed(
         description=f"✅ Notifications will now be sent to {channel.mention}",
@@ -178,11 +478,13 @@ async def set_channel(interaction: discord.Interaction, channel: discord.TextCha
 async def set_role(interaction: discord.Interaction, role: discord.Role):
     guild_id = str(interaction.guild_id)
     
-    await guild_settings.update_one(
-        {"guild_id": guild_id},
-        {"$set": {"ping_role_id": role.id}},
-        upsert=True
-    )
+    with mongo_latency.time(operation='set_role'):
+        await guild_settings.update_one(
+            {"guild_id": guild_id},
+            {"$set": {"ping_role_id": role.id}},
+            upsert=True
+        )
+    guild_settings_cache.update(guild_id, {"ping_role_id": role.id})
     
     embed = discord.Embed(
         description=f"✅ Will now ping {role.mention} when a tracked player is online",
@@ -191,6 +493,35 @@ async def set_role(interaction: discord.Interaction, role: discord.Role):
     
     await interaction.response.send_message(embed=embed)
 
+# channel_id -> resolved channel, so notifications skip the fetch_channel REST call
+channel_cache = {}
+
+async def resolve_channel(channel_id: int):
+    channel = channel_cache.get(channel_id) or client.get_channel(channel_id)
+    if channel is None:
+        channel = await client.fetch_channel(channel_id)
+    channel_cache[channel_id] = channel
+    return channel
+
+def invalidate_channel(channel_id: int):
+    channel_cache.pop(channel_id, None)
+
+# Discord error code for a channel that no longer exists; 10008 (Unknown Message) leaves the channel valid
+UNKNOWN_CHANNEL = 10003
+
+def invalidate_channel_on_error(channel_id: int, error: discord.HTTPException):
+    if isinstance(error, discord.Forbidden) or (isinstance(error, discord.NotFound) and error.code == UNKNOWN_CHANNEL):
+        invalidate_channel(channel_id)
+
+@client.event
+async def on_guild_channel_delete(channel):
+    invalidate_channel(channel.id)
+
+@client.event
+async def on_guild_channel_update(before, after):
+    # Permission overwrites may have changed; resolve the channel again on next use
+    invalidate_channel(after.id)
+
 class JoinServerButton(discord.ui.View):
     def __init__(self, place_id: int, user_id: int):
         super().__init__(timeout=None)
@@ -206,8 +537,8 @@ class JoinServerButton(discord.ui.View):
         self.add_item(button)
 
 async def send_online_notification(guild_id: str, user_id: str, player_data: dict, status_info: dict):
-    user_info = status_info.get('user_info', {})
-    display_name = user_info.get('displayName', player_data.get('display_name', 'Unknown'))
+    user_info = status_info.get('user_info')
+    display_name = user_info.display_name if user_info else player_data.get('display_name', 'Unknown')
     
     avatar_url = await roblox_api.get_user_avatar_url(int(user_id))
     profile_link = f"https://www.roblox.com/users/{user_id}/profile"
@@ -218,6 +549,12 @@ async def send_online_notification(guild_id: str, user_id: str, player_data: dic
         f"**Status: Online ✅**"
     )
     
+    game_info = status_info.get('game_info')
+    if game_info and game_info.root_place_id:
+        description += f"\n**Playing: [{game_info.name}](https://www.roblox.com/games/{game_info.root_place_id})**"
+    elif status_info.get('game') and status_info['game'] != 'Playing':
+        description += f"\n**Playing: {status_info['game']}**"
+    
     embed = discord.Embed(
         description=description,
         color=0xFFFFFF,
@@ -226,14 +563,16 @@ async def send_online_notification(guild_id: str, user_id: str, player_data: dic
     
     if avatar_url:
         embed.set_image(url=avatar_url)
+    if game_info and game_info.icon_url:
+        embed.set_thumbnail(url=game_info.icon_url)
     
-    settings = await guild_settings.find_one({"guild_id": guild_id})
+    settings = await guild_settings_cache.get(guild_id)
 
     if not settings or not settings.get('notification_channel_id'):
         return
     
     try:
-        channel = await client.fetch_channel(settings['notification_channel_id'])
+        channel = await resolve_channel(settings['notification_channel_id'])
     except Exception as e:
         print(f"Failed to fetch channel: {e}")
         return
@@ -242,28 +581,37 @@ async def send_online_notification(guild_id: str, user_id: str, player_data: dic
     if settings.get('ping_role_id'):
         role_mention = f"<@&{settings['ping_role_id']}>"
     
-    presence = status_info.get('presence', {})
-    place_id = presence.get('placeId')
+    presence = status_info.get('presence')
+    place_id = presence.place_id if presence else None
     view = JoinServerButton(place_id=place_id, user_id=int(user_id)) if place_id else None
     
-    msg = await channel.send(content=role_mention if role_mention else None, embed=embed, view=view)
+    try:
+        with discord_latency.time(operation='send'), tracer.span('discord_send', 'discord', user_id=user_id, guild_id=guild_id):
+            msg = await channel.send(content=role_mention if role_mention else None, embed=embed, view=view)
+    except (discord.Forbidden, discord.NotFound) as e:
+        invalidate_channel_on_error(settings['notification_channel_id'], e)
+        raise
     
-    await tracked_players.update_one(
-        {"guild_id": guild_id, "roblox_id": user_id},
-        {"$set": {"message_id": msg.id}}
-    )
+    update_player(guild_id, user_id, {"message_id": msg.id})
+
+def update_player(guild_id: str, user_id: str, fields: dict):
+    # Keep the in-memory row current and queue the same change for Mongo
+    player_state.update(guild_id, user_id, fields)
+    player_writes.set(guild_id, user_id, fields)
 
 async def update_offline_notification(guild_id: str, user_id: str, player_data: dict):
-    if not player_data.get('message_id'):
+    # player_data is the live row, so a message sent since the cycle started is already on it
+    message_id = player_data.get('message_id')
+    if not message_id:
         return
 
-    settings = await guild_settings.find_one({"guild_id": guild_id})
+    settings = await guild_settings_cache.get(guild_id)
     if not settings or not settings.get('notification_channel_id'):
         return
 
     try:
-        channel = await client.fetch_channel(settings['notification_channel_id'])
-        msg = await channel.fetch_message(player_data['message_id'])
+        channel = await resolve_channel(settings['notification_channel_id'])
+        msg = channel.get_partial_message(message_id)
         
         display_name = player_data.get('display_name', 'Unknown')
         profile_link = f"https://www.roblox.com/users/{user_id}/profile"
@@ -283,71 +631,361 @@ async def update_offline_notification(guild_id: str, user_id: str, player_data:
         if avatar_url:
             embed.set_image(url=avatar_url)
 
-        await msg.edit(content=None, embed=embed, view=None)
+        with discord_latency.time(operation='edit'), tracer.span('discord_edit', 'discord', user_id=user_id, guild_id=guild_id):
+            await msg.edit(content=None, embed=embed, view=None)
         
         # Clear message_id after marking offline to avoid re-editing
-        await tracked_players.update_one(
-            {"guild_id": guild_id, "roblox_id": user_id},
-            {"$set": {"message_id": None}}
-        )
+        update_player(guild_id, user_id, {"message_id": None})
+    except (discord.Forbidden, discord.NotFound) as e:
+        invalidate_channel_on_error(settings['notification_channel_id'], e)
+        print(f"Failed to update offline message for {user_id}: {e}")
     except Exception as e:
         print(f"Failed to update offline message for {user_id}: {e}")
 
-@tasks.loop(seconds=30)
-async def check_players():
+async def fetch_presence_batch(batch: list) -> list:
+    user_ids = [int(user_id) for user_id, _ in batch]
+    presences = await roblox_api.get_multiple_user_presences(user_ids)
+    
+    # Only players that will produce a notification need user info and avatars; resolve them in bulk
+    notify_ids = []
+    for user_id, guild_players in batch:
+        presence = presences.get(int(user_id))
+        if presence is None:
+            continue
+        online = presence.online
+        if any((p.get('last_status') == 'online') != online for p in guild_players):
+            notify_ids.append(int(user_id))
+    
+    for user_id, guild_players in batch:
+        presence = presences.get(int(user_id))
+        if presence is not None:
+            poll_scheduler.record(user_id, presence.online, int(user_id) in notify_ids)
+    
+    # Players going online share one game lookup per batch; repeats across guilds and cycles hit the cache
+    universe_ids = [
+        presences[user_id].universe_id for user_id in notify_ids
+        if presences[user_id].online and presences[user_id].universe_id
+    ]
+    user_infos, _, game_infos = await asyncio.gather(
+        roblox_api.get_multiple_user_infos(notify_ids),
+        roblox_api.get_multiple_avatar_urls(notify_ids),
+        roblox_api.get_multiple_game_infos(universe_ids)
+    )
+    
+    results = []
+    for user_id, guild_players in batch:
+        presence = presences.get(int(user_id))
+        if presence is None:
+            # Lookup failed this cycle; keep the stored status instead of flipping to offline
+            continue
+        status_info = roblox_api.build_player_status(presence, user_infos.get(int(user_id)), game_infos.get(presence.universe_id))
+        results.append((user_id, guild_players, status_info))
+    return results
+
+async def detect_transitions(item: tuple) -> list:
+    user_id, guild_players, status_info = item
+    current_status = 'online' if status_info.get('online', False) else 'offline'
+    
+    results = []
+    for player_data in guild_players:
+        last_status = player_data.get('last_status')
+        
+        # Offline -> Online
+        if current_status == 'online' and last_status != 'online':
+            transition = 'online'
+        # Online -> Offline
+        elif current_status == 'offline' and last_status == 'online':
+            transition = 'offline'
+        else:
+            transition = None
+        
+        results.append((user_id, player_data, status_info, current_status, transition))
+    return results
+
+async def deliver_online_notification(guild_id: str, user_id: str, player_data: dict, status_info: dict, previous_status: str):
     try:
-        cursor = tracked_players.find({})
-        all_players = await cursor.to_list(length=1000)
+        await send_online_notification(guild_id, user_id, player_data, status_info)
+    except Exception as e:
+        print(f"Error checking player {user_id}: {e}")
+        # Roll last_status back so a later cycle retries the notification
+        update_player(guild_id, user_id, {"last_status": previous_status})
+
+async def dispatch_notification(item: tuple) -> list:
+    user_id, player_data, status_info, current_status, transition = item
+    guild_id = player_data['guild_id']
+    
+    if transition is None:
+        return [item]
+    
+    settings = await guild_settings_cache.get(guild_id)
+    if not settings or not settings.get('notification_channel_id'):
+        return [item]
+    
+    # Delivery happens on the channel's queue so the poll loop never waits on Discord
+    key = (guild_id, user_id)
+    if transition == 'online':
+        # persist_status updates the live row before delivery, so remember what to roll back to
+        previous_status = player_data.get('last_status')
+        notifications.submit(settings['notification_channel_id'], key, 'online', lambda: deliver_online_notification(guild_id, user_id, player_data, status_info, previous_status))
+    else:
+        notifications.submit(settings['notification_channel_id'], key, 'offline', lambda: update_offline_notification(guild_id, user_id, player_data))
+    return [item]
+
+async def persist_status(item: tuple) -> None:
+    user_id, player_data, status_info, current_status, transition = item
+    
+    # Buffered and flushed once per cycle; unchanged rows are never written
+    if player_data.get('last_status') != current_status:
+        update_player(player_data['guild_id'], user_id, {"last_status": current_status})
+
+def trace_batch(batch: list) -> dict:
+    return {"players": len(batch)}
+
+def trace_player(item: tuple) -> dict:
+    return {"user_id": item[0]}
+
+poll_pipeline = Pipeline([
+    Stage('presence', fetch_presence_batch, workers=POLL_STAGE_WORKERS['presence'], queue_size=POLL_QUEUE_SIZE, trace_args=trace_batch),
+    Stage('detect', detect_transitions, workers=POLL_STAGE_WORKERS['detect'], queue_size=POLL_QUEUE_SIZE, trace_args=trace_player),
+    Stage('notify', dispatch_notification, workers=POLL_STAGE_WORKERS['notify'], queue_size=POLL_QUEUE_SIZE, trace_args=trace_player),
+    Stage('persist', persist_status, workers=POLL_STAGE_WORKERS['persist'], queue_size=POLL_QUEUE_SIZE, trace_args=trace_player)
+])
+
+async def iter_player_batches(user_ids: list):
+    for i in range(0, len(user_ids), PRESENCE_BATCH_SIZE):
+        # Every guild's row per user, so a player tracked by many guilds is looked up once
+        batch = []
+        for user_id in user_ids[i:i + PRESENCE_BATCH_SIZE]:
+            guild_players = player_state.rows_for(user_id)
+            if guild_players:
+                batch.append((user_id, guild_players))
+            else:
+                # No guild tracks this user any more
+                poll_scheduler.remove(user_id)
         
-        for player_data in all_players:
-            guild_id = player_data['guild_id']
-            user_id = player_data['roblox_id']
-            
+        if batch:
+            yield batch
+
+def owns_player(roblox_id: str) -> bool:
+    return shard_coordinator is None or shard_coordinator.owns(roblox_id)
+
+def sync_owned_players():
+    poll_scheduler.sync([roblox_id for roblox_id in player_state.roblox_ids() if owns_player(roblox_id)])
+
+async def reload_player_state():
+    # Full read of tracked_players: at startup, when the change stream reopens, or as its fallback.
+    # Rows this process polls keep their in-memory state
+    with mongo_latency.time(operation='load_players'):
+        await player_state.load(keep=owns_player)
+    sync_owned_players()
+
+@tasks.loop(minutes=5)
+async def sync_poll_schedule():
+    # From memory only; the table is kept current by the change stream and the commands
+    try:
+        sync_owned_players()
+    except Exception as e:
+        print(f"Error syncing poll schedule: {e}")
+
+@tasks.loop(seconds=1)
+async def check_players():
+    global last_cycle_completed
+    
+    due_ids = []
+    # While our leases have lapsed (e.g. Mongo unreachable) nothing is polled, but nothing is dropped either;
+    # pop_due has already rescheduled these users, so they come round again once the leases are renewed
+    leases_valid = shard_coordinator is None or shard_coordinator.leases_valid()
+    for user_id in poll_scheduler.pop_due():
+        if not leases_valid:
+            continue
+        if owns_player(user_id):
+            due_ids.append(user_id)
+        else:
+            # Another shard owns this user now
+            poll_scheduler.remove(user_id)
+    if not due_ids:
+        last_cycle_completed = time.monotonic()
+        return
+    
+    start = time.perf_counter()
+    tracer.start_cycle()
+    try:
+        with tracer.span('cycle', players=len(due_ids)):
             try:
-                status_info = await roblox_api.get_player_status(int(user_id))
-                current_status = 'online' if status_info.get('online', False) else 'offline'
-                last_status = player_data.get('last_status')
-
-                # Offline -> Online
-                if current_status == 'online' and last_status != 'online':
-                    await send_online_notification(guild_id, user_id, player_data, status_info)
-                
-                # Online -> Offline
-                elif current_status == 'offline' and last_status == 'online':
-                    await update_offline_notification(guild_id, user_id, player_data)
-                
-                await tracked_players.update_one(
-                    {"guild_id": guild_id, "roblox_id": user_id},
-                    {"$set": {"last_status": current_status}}
-                )
-                
+                await poll_pipeline.run(iter_player_batches(due_ids))
             except Exception as e:
-                print(f"Error checking player {user_id}: {e}")
-            
-            await asyncio.sleep(0.5)
-                
-    except Exception as e:
-        print(f"Error in check_players loop: {e}")
+                print(f"Error in check_players loop: {e}")
+            finally:
+                with mongo_latency.time(operation='bulk_write'), tracer.span('mongo_write', 'mongo', rows=len(player_writes.pending)):
+                    await player_writes.flush()
+    finally:
+        await tracer.end_cycle()
+    
+    cycle_duration.observe(time.perf_counter() - start)
+    players_polled.set(len(due_ids))
+    players_polled_total.inc(len(due_ids))
+    last_cycle_completed = time.monotonic()
 
 @check_players.before_loop
 async def before_check_players():
-    await client.wait_until_ready()
+    if BOT_ROLE != 'poller':
+        await client.wait_until_ready()
+
+@sync_poll_schedule.before_loop
+async def before_sync_poll_schedule():
+    if BOT_ROLE != 'poller':
+        await client.wait_until_ready()
+
+def schedule_new_player(roblox_id: str):
+    # Players added through another process (e.g. the gateway's /add-player)
+    if owns_player(roblox_id):
+        poll_scheduler.add(roblox_id)
+
+def start_polling():
+    player_state.start(reload=reload_player_state, on_insert=schedule_new_player)
+    if not sync_poll_schedule.is_running():
+        sync_poll_schedule.start()
+    if not check_players.is_running():
+        check_players.start()
+
+async def start_sharding():
+    global shard_coordinator
+    
+    if not POLL_SHARDING:
+        return
+    
+    async def on_shard_change():
+        # Pick up users in newly acquired slots straight away; the table already holds every row
+        sync_owned_players()
+    
+    async def on_slots_acquired(slots):
+        # Another node may have polled these players since; its stored status and message_id are newer than ours
+        with mongo_latency.time(operation='refresh_players'):
+            await player_state.refresh([roblox_id for roblox_id in player_state.roblox_ids() if shard_coordinator.slot_for(roblox_id) in slots])
+    
+    shard_coordinator = ShardCoordinator(db.poller_leases, NODE_ID, on_change=on_shard_change, on_acquire=on_slots_acquired)
+    await shard_coordinator.start()
+
+def command_tree_hash() -> str:
+    commands = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda command: (command['type'], command['name']))
+    return hashlib.sha256(json.dumps(commands, sort_keys=True, default=str).encode()).hexdigest()
+
+async def sync_command_tree():
+    global command_tree_synced
+    
+    # tree.sync() is a rate-limited global REST call; skip it unless the command definitions changed
+    state_id = f"command_tree:{client.application_id}"
+    try:
+        tree_hash = command_tree_hash()
+    except Exception as e:
+        print(f"Could not hash command tree, syncing unconditionally: {e}")
+        tree_hash = None
+    
+    try:
+        if tree_hash is not None:
+            with mongo_latency.time(operation='find_bot_state'):
+                state = await bot_state.find_one({"_id": state_id})
+            if state and state.get('hash') == tree_hash:
+                command_tree_synced = True
+                return
+        
+        await tree.sync()
+        command_tree_synced = True
+        if tree_hash is not None:
+            with mongo_latency.time(operation='update_bot_state'):
+                await bot_state.update_one(
+                    {"_id": state_id},
+                    {"$set": {"hash": tree_hash, "synced_at": datetime.utcnow()}},
+                    upsert=True
+                )
+        print(f'Synced command tree ({tree_hash[:12] if tree_hash else "unhashed"})', flush=True)
+    except Exception as e:
+        # Left unsynced, so the next on_ready (e.g. a reconnect) tries again
+        print(f"Failed to sync command tree: {e}")
+
+command_tree_synced = False
+command_tree_task = None
 
 @client.event
 async def on_ready():
-    await tree.sync()
+    global command_tree_task
+    
+    guild_settings_cache.start()
+    
+    if BOT_ROLE != 'gateway':
+        start_polling()
+    
+    # on_ready also fires on reconnects; once the tree is synced it is not checked again
+    if not command_tree_synced and (command_tree_task is None or command_tree_task.done()):
+        command_tree_task = asyncio.create_task(sync_command_tree())
+    
     print(f'Logged in as {client.user}', flush=True)
+
+async def ensure_indexes():
+    indexes = [
+        (tracked_players, [("guild_id", ASCENDING), ("roblox_id", ASCENDING)], {"unique": True, "name": "guild_id_roblox_id"}),
+        (tracked_players, [("roblox_id", ASCENDING)], {"name": "roblox_id"}),
+        (guild_settings, [("guild_id", ASCENDING)], {"unique": True, "name": "guild_id"})
+    ]
     
-    if not check_players.is_running():
-        check_players.start()
+    for collection, keys, options in indexes:
+        start = time.perf_counter()
+        try:
+            await collection.create_index(keys, **options)
+            print(f"Ensured index {collection.name}.{options['name']} in {time.perf_counter() - start:.2f}s", flush=True)
+        except PyMongoError as e:
+            # Most likely duplicate rows blocking a unique index; the bot still works without it
+            print(f"Failed to create index {collection.name}.{options['name']}: {e}")
+
+async def warm_roblox_cache():
+    store = roblox_api.persistent_store
+    if store is None:
+        return
+    
+    start = time.perf_counter()
+    try:
+        await store.ensure_indexes()
+        loaded = await roblox_api.warm_cache()
+        print(f"Warmed Roblox cache with {loaded} entries in {time.perf_counter() - start:.2f}s", flush=True)
+    except PyMongoError as e:
+        print(f"Failed to warm Roblox cache: {e}")
+    store.start()
 
 async def health_check(request):
+    # Gateway-only processes never run the poll loop
+    if BOT_ROLE == 'gateway':
+        return web.Response(text="Bot is running!")
+    
+    # Empty cycles still complete while leases are lapsed, so staleness alone would not show it
+    if shard_coordinator is not None and not shard_coordinator.leases_valid():
+        return web.Response(text="Degraded: shard leases have lapsed, not polling", status=503)
+    
+    stale_for = time.monotonic() - last_cycle_completed
+    if stale_for > HEALTH_STALE_SECONDS:
+        return web.Response(text=f"Degraded: no completed poll cycle for {stale_for:.0f}s", status=503)
     return web.Response(text="Bot is running!")
 
+def collect_cache_metrics():
+    for cache_type, stats in roblox_api.cache_stats().items():
+        lookups = stats['hits'] + stats['misses']
+        cache_hit_ratio.set(stats['hits'] / lookups if lookups else 0, cache_type=cache_type)
+        cache_size.set(stats['size'], cache_type=cache_type)
+
+registry.add_collector(collect_cache_metrics)
+
+def collect_notification_metrics():
+    notification_backlog.set(notifications.pending())
+
+registry.add_collector(collect_notification_metrics)
+
+async def metrics_handler(request):
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
 async def start_web_server():
     app = web.Application()
     app.router.add_get('/', health_check)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics_handler)
     
     port = int(os.getenv('PORT', 8080))
     runner = web.AppRunner(app)
@@ -368,7 +1006,20 @@ async def main():
         return
     
     await start_web_server()
-    await client.start(token)
+    await asyncio.gather(ensure_indexes(), warm_roblox_cache())
+    
+    if BOT_ROLE != 'gateway':
+        await start_sharding()
+    
+    if BOT_ROLE == 'poller':
+        # Pollers only need Discord's REST API to send and edit notifications
+        await client.login(token)
+        guild_settings_cache.start()
+        start_polling()
+        print(f'Poller {NODE_ID} running as {client.user}', flush=True)
+        await asyncio.Event().wait()
+    else:
+        await client.start(token)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+
+class TTLCache:
+    """Bounded LRU cache with a fixed TTL and size budget per cache type.
+
+    Each cache type gets its own partition, so get/set/evict are O(1) and
+    clearing a type swaps in an empty partition instead of scanning every key.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_sizes: Dict[str, int], default_ttl: float = 60, default_max_size: int = 1000):
+        self.ttls = ttls
+        self.max_sizes = max_sizes
+        self.default_ttl = default_ttl
+        self.default_max_size = default_max_size
+        # cache_type -> OrderedDict[key, (data, expires_at)], least recently used first
+        self._entries: Dict[str, OrderedDict] = {}
+        # cache_type -> deque[(expires_at, key)] in write order. TTL is fixed per type so this is sorted;
+        # an explicit shorter TTL can only make an entry expire late in the sweep, get() still checks it
+        self._expiry_queues: Dict[str, deque] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+    def _partition(self, cache_type: str) -> OrderedDict:
+        entries = self._entries.get(cache_type)
+        if entries is None:
+            entries = self._entries[cache_type] = OrderedDict()
+            self._expiry_queues[cache_type] = deque()
+            self._stats[cache_type] = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        return entries
+
+    def get(self, key: str, cache_type: str) -> Optional[Any]:
+        entries = self._partition(cache_type)
+        stats = self._stats[cache_type]
+        entry = entries.get(key)
+        if entry is None:
+            stats['misses'] += 1
+            return None
+        data, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del entries[key]
+            stats['expirations'] += 1
+            stats['misses'] += 1
+            return None
+        entries.move_to_end(key)
+        stats['hits'] += 1
+        return data
+
+    def set(self, key: str, data: Any, cache_type: str, ttl: Optional[float] = None):
+        entries = self._partition(cache_type)
+        if ttl is None:
+            ttl = self.ttls.get(cache_type, self.default_ttl)
+        expires_at = time.monotonic() + ttl
+        entries[key] = (data, expires_at)
+        entries.move_to_end(key)
+        self._expiry_queues[cache_type].append((expires_at, key))
+
+        max_size = self.max_sizes.get(cache_type, self.default_max_size)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+            self._stats[cache_type]['evictions'] += 1
+
+    def delete(self, key: str, cache_type: str):
+        self._partition(cache_type).pop(key, None)
+
+    def clear(self, cache_type: Optional[str] = None):
+        # Only entries are dropped; hit/miss/eviction counters are cumulative and survive a clear
+        cache_types = [cache_type] if cache_type else list(self._entries)
+        for name in cache_types:
+            if name in self._entries:
+                self._entries[name] = OrderedDict()
+                self._expiry_queues[name] = deque()
+
+    def expire(self) -> int:
+        """Drop every expired entry. Amortised O(1) per write."""
+        now = time.monotonic()
+        removed = 0
+        for cache_type, queue in self._expiry_queues.items():
+            entries = self._entries[cache_type]
+            while queue and queue[0][0] <= now:
+                expires_at, key = queue.popleft()
+                entry = entries.get(key)
+                # Skip queue items left behind by a later write of the same key
+                if entry is not None and entry[1] == expires_at:
+                    del entries[key]
+                    self._stats[cache_type]['expirations'] += 1
+                    removed += 1
+        return removed
+
+    async def _sweep(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.expire()
+
+    def start_sweeper(self, interval: float = 30):
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.create_task(self._sweep(interval))
+
+    def stop_sweeper(self):
+        if self._sweeper_task and not self._sweeper_task.done():
+            self._sweeper_task.cancel()
+        self._sweeper_task = None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            cache_type: {**counters, 'size': len(self._entries.get(cache_type, ()))}
+            for cache_type, counters in self._stats.items()
+        }
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
@@ -0,0 +1,88 @@
+import random
+import time
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after `failure_threshold` consecutive failures.
+
+    While open every call fails fast. After `reset_timeout` seconds it goes
+    half-open and lets `half_open_probes` requests through; a success closes
+    it again, a failure re-opens it for another `reset_timeout`.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, half_open_probes: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+        if self.probes_in_flight < self.half_open_probes:
+            self.probes_in_flight += 1
+            return True
+        return False
+
+    def release(self):
+        # A request that ended without a verdict (e.g. cancelled) gives its probe slot back
+        if self.state == self.HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probes_in_flight = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"Circuit opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probes_in_flight = 0
+
+
+class RetryBudget:
+    """Caps the number of retries spent across all requests in a time window.
+
+    The poll loop ticks every second and each tick only covers the players
+    that are due, so the budget refills per `window` seconds rather than per
+    tick.
+    """
+
+    def __init__(self, retries_per_window: int = 50, window: float = 60):
+        self.retries_per_window = retries_per_window
+        self.window = window
+        self.remaining = retries_per_window
+        self.window_started = time.monotonic()
+
+    def reset(self):
+        self.remaining = self.retries_per_window
+        self.window_started = time.monotonic()
+
+    def try_spend(self) -> bool:
+        if time.monotonic() - self.window_started >= self.window:
+            self.reset()
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8) -> float:
+    # Full jitter: spreads retries from many callers instead of synchronising them
+    return random.uniform(0, min(cap, base * 2 ** attempt))
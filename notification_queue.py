@@ -0,0 +1,63 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable
+
+from metrics import registry
+
+coalesced_total = registry.counter('discord_notifications_coalesced_total', 'Queued notifications replaced or cancelled before delivery')
+
+
+class NotificationDispatcher:
+    """Per-channel outbound queue for Discord notifications.
+
+    Each channel is drained by its own worker, one operation at a time, so a
+    channel sitting on its Discord rate-limit bucket only delays itself.
+    `max_concurrency` bounds how many channels are sending at once.
+
+    Operations are keyed by (player key, kind). A newer operation of the same
+    kind replaces a queued one, and an 'offline' arriving while the matching
+    'online' send is still queued cancels both: the message was never sent,
+    so there is nothing to mark offline.
+    """
+
+    def __init__(self, max_concurrency: int = 10):
+        self.queues: Dict[int, OrderedDict] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def submit(self, channel_id: int, key: Hashable, kind: str, operation: Callable[[], Awaitable[None]]):
+        queue = self.queues.setdefault(channel_id, OrderedDict())
+
+        if kind == 'offline' and (key, 'online') in queue:
+            del queue[(key, 'online')]
+            coalesced_total.inc(2)
+        elif (key, kind) in queue:
+            queue[(key, kind)] = operation
+            coalesced_total.inc()
+        else:
+            queue[(key, kind)] = operation
+
+        if channel_id not in self.workers:
+            self.workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+
+    async def _drain(self, channel_id: int):
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                (key, kind), operation = queue.popitem(last=False)
+                async with self.semaphore:
+                    try:
+                        await operation()
+                    except Exception as e:
+                        print(f"Failed to deliver {kind} notification for {key}: {e}")
+        finally:
+            # No await between the empty check and here, so submit() cannot slip an item in
+            self.queues.pop(channel_id, None)
+            self.workers.pop(channel_id, None)
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def join(self):
+        while self.workers:
+            await asyncio.gather(*list(self.workers.values()), return_exceptions=True)
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+
+from cache import TTLCache
+from records import from_document, to_document
+
+
+class MongoCacheStore:
+    """Persistent tier for RobloxAPI cache entries, backed by a Mongo collection.
+
+    Entries are written behind in batches and expire through a TTL index on
+    `expires_at`, so the collection never needs manual cleanup. On startup
+    `load` copies every unexpired entry back into the in-memory cache with
+    its remaining TTL, so a restart does not begin with a cold cache.
+    """
+
+    def __init__(self, collection, cache_types: Iterable[str] = ('user_info', 'avatar'), flush_interval: float = 30):
+        self.collection = collection
+        self.cache_types = set(cache_types)
+        self.flush_interval = flush_interval
+        # cache_key -> (cache_type, data, expires_at); later writes of a key replace earlier ones
+        self.pending: Dict[str, Tuple[str, object, datetime]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+    def record(self, cache_key: str, data: object, cache_type: str, ttl: float):
+        if cache_type not in self.cache_types:
+            return
+        self.pending[cache_key] = (cache_type, data, datetime.now(timezone.utc) + timedelta(seconds=ttl))
+
+    async def load(self, cache: TTLCache) -> int:
+        now = datetime.now(timezone.utc)
+        cursor = self.collection.find(
+            {"cache_type": {"$in": list(self.cache_types)}, "expires_at": {"$gt": now}},
+            sort=[("expires_at", 1)]
+        )
+        loaded = 0
+        async for doc in cursor:
+            expires_at = doc['expires_at']
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            remaining = (expires_at - now).total_seconds()
+            if remaining > 0:
+                cache.set(doc['_id'], from_document(doc['data']), doc['cache_type'], ttl=remaining)
+                loaded += 1
+        return loaded
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+
+        pending, self.pending = self.pending, {}
+        operations = [
+            ReplaceOne(
+                {"_id": cache_key},
+                {"cache_type": cache_type, "data": to_document(data), "expires_at": expires_at},
+                upsert=True
+            )
+            for cache_key, (cache_type, data, expires_at) in pending.items()
+        ]
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+            return len(operations)
+        except PyMongoError as e:
+            print(f"Failed to persist cache entries: {e}")
+            for cache_key, entry in pending.items():
+                self.pending.setdefault(cache_key, entry)
+            return 0
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def stop(self):
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Union
+
+from tracing import tracer
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    `handler` takes one item and returns the items to pass to the next stage
+    (or None to drop it). Each stage runs `workers` concurrent handlers and
+    reads from a queue bounded at `queue_size`, so a slow stage applies
+    backpressure to the ones before it instead of buffering everything.
+    `trace_args`, if given, maps an item to the arguments recorded on its
+    trace span.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Optional[Iterable[Any]]]], workers: int = 1, queue_size: int = 100, trace_args: Optional[Callable[[Any], dict]] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.trace_args = trace_args
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        while True:
+            item = await inbox.get()
+            try:
+                if tracer.enabled:
+                    with tracer.span(stage.name, 'stage', **(stage.trace_args(item) if stage.trace_args else {})):
+                        outputs = await stage.handler(item)
+                else:
+                    outputs = await stage.handler(item)
+                if outputs and outbox is not None:
+                    for output in outputs:
+                        await outbox.put(output)
+            except Exception as e:
+                print(f"Error in {stage.name} stage: {e}")
+            finally:
+                inbox.task_done()
+
+    async def run(self, items: Union[Iterable[Any], AsyncIterable[Any]]):
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        workers = []
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            workers.append([
+                asyncio.create_task(self._worker(stage, queues[index], outbox))
+                for _ in range(stage.workers)
+            ])
+
+        try:
+            # Async sources (e.g. a DB cursor) are pulled only as fast as the first queue drains
+            if hasattr(items, '__aiter__'):
+                async for item in items:
+                    await queues[0].put(item)
+            else:
+                for item in items:
+                    await queues[0].put(item)
+
+            # Drain stage by stage: once a queue is empty its stage can emit nothing more
+            for queue, stage_workers in zip(queues, workers):
+                await queue.join()
+                for task in stage_workers:
+                    task.cancel()
+        finally:
+            for stage_workers in workers:
+                for task in stage_workers:
+                    task.cancel()
+            await asyncio.gather(*(task for stage_workers in workers for task in stage_workers), return_exceptions=True)
@@ -0,0 +1,183 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+
+class PlayerStateTable:
+    """In-memory copy of the tracked_players fields the poll loop needs.
+
+    Rows are keyed by (guild_id, roblox_id) and also indexed by roblox_id for
+    fan-out. The table is loaded from Mongo once and then kept current by the
+    code paths that change a row, so a poll cycle reads no documents; Mongo
+    is only written when something changes. Players added or removed by
+    another process (e.g. a gateway) arrive through a change stream, so the
+    collection is only read in full when the stream (re)opens; without change
+    streams the table falls back to reloading every `reload_interval` seconds.
+    """
+
+    def __init__(self, collection, projection: dict):
+        self.collection = collection
+        self.projection = projection
+        self.rows: Dict[Tuple[str, str], dict] = {}
+        self.by_user: Dict[str, Dict[str, dict]] = {}
+        # Keys removed while a load() is streaming, so the swap does not resurrect them
+        self._removed_during_load: Optional[Set[Tuple[str, str]]] = None
+        self._added_during_load: Optional[Set[Tuple[str, str]]] = None
+        # Change stream deletes only carry _id, so remember which row each document is
+        self._keys_by_doc_id: Dict[object, Tuple[str, str]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    async def load(self, keep: Optional[Callable[[str], bool]] = None):
+        """(Re)build the table from Mongo.
+
+        Rows already in memory whose roblox_id passes `keep` are kept as-is:
+        this process polls them, so its values are the newest and may not be
+        flushed yet. Every other row takes the stored values, since another
+        process may be polling it.
+        """
+        self._removed_during_load = set()
+        self._added_during_load = set()
+        rows = {}
+        by_user = {}
+        keys_by_doc_id = {}
+        cursor = self.collection.find({}, projection={**self.projection, "_id": 1}, batch_size=1000)
+        async for doc in cursor:
+            key = (doc['guild_id'], doc['roblox_id'])
+            keys_by_doc_id[doc.pop('_id')] = key
+            rows[key] = doc
+
+        # No awaits from here on, so nothing can change the table mid-swap
+        for key in self._removed_during_load:
+            rows.pop(key, None)
+        for key in self._added_during_load:
+            if key not in rows and key in self.rows:
+                rows[key] = self.rows[key]
+        for doc_id, key in self._keys_by_doc_id.items():
+            if key in self._added_during_load:
+                keys_by_doc_id.setdefault(doc_id, key)
+        self._removed_during_load = None
+        self._added_during_load = None
+        for key in rows:
+            existing = self.rows.get(key)
+            if existing is not None and keep is not None and keep(key[1]):
+                rows[key] = existing
+            row = rows[key]
+            by_user.setdefault(row['roblox_id'], {})[row['guild_id']] = row
+        self.rows = rows
+        self.by_user = by_user
+        self._keys_by_doc_id = keys_by_doc_id
+
+    async def refresh(self, roblox_ids: Iterable[str]):
+        """Overwrite the rows of `roblox_ids` with what is stored in Mongo.
+
+        Used when this process takes over polling players from another one,
+        whose writes are newer than anything held here.
+        """
+        roblox_ids = list(roblox_ids)
+        for i in range(0, len(roblox_ids), 1000):
+            chunk = roblox_ids[i:i + 1000]
+            fresh = {}
+            cursor = self.collection.find({"roblox_id": {"$in": chunk}}, projection={**self.projection, "_id": 1})
+            async for doc in cursor:
+                key = (doc['guild_id'], doc['roblox_id'])
+                self._keys_by_doc_id[doc.pop('_id')] = key
+                fresh[key] = doc
+
+            for roblox_id in chunk:
+                for guild_id in list(self.by_user.get(roblox_id, {})):
+                    if (guild_id, roblox_id) not in fresh:
+                        self.remove(guild_id, roblox_id)
+            for (guild_id, roblox_id), doc in fresh.items():
+                row = self.rows.get((guild_id, roblox_id))
+                if row is None:
+                    self.upsert(guild_id, roblox_id, doc)
+                else:
+                    # Updated in place so pipeline items already holding the row see the new values
+                    row.clear()
+                    row.update(doc)
+
+    def get(self, guild_id: str, roblox_id: str) -> Optional[dict]:
+        return self.rows.get((guild_id, roblox_id))
+
+    def rows_for(self, roblox_id: str) -> List[dict]:
+        return list(self.by_user.get(roblox_id, {}).values())
+
+    def roblox_ids(self) -> Iterable[str]:
+        return self.by_user.keys()
+
+    def upsert(self, guild_id: str, roblox_id: str, fields: dict):
+        row = self.rows.get((guild_id, roblox_id))
+        if row is None:
+            if self._added_during_load is not None:
+                self._added_during_load.add((guild_id, roblox_id))
+            row = self.rows[(guild_id, roblox_id)] = {'guild_id': guild_id, 'roblox_id': roblox_id}
+            self.by_user.setdefault(roblox_id, {})[guild_id] = row
+        row.update({field: value for field, value in fields.items() if self.projection.get(field)})
+
+    def update(self, guild_id: str, roblox_id: str, fields: dict):
+        row = self.rows.get((guild_id, roblox_id))
+        if row is not None:
+            row.update(fields)
+
+    def remove(self, guild_id: str, roblox_id: str):
+        if self._removed_during_load is not None:
+            self._removed_during_load.add((guild_id, roblox_id))
+        self.rows.pop((guild_id, roblox_id), None)
+        guilds = self.by_user.get(roblox_id)
+        if guilds is not None:
+            guilds.pop(guild_id, None)
+            if not guilds:
+                del self.by_user[roblox_id]
+
+    def _apply_change(self, change: dict, on_insert: Optional[Callable[[str], None]]):
+        operation = change.get('operationType')
+        if operation == 'insert':
+            doc = change.get('fullDocument') or {}
+            if not doc.get('guild_id') or not doc.get('roblox_id'):
+                return
+            key = (doc['guild_id'], doc['roblox_id'])
+            self._keys_by_doc_id[doc['_id']] = key
+            if self.rows.get(key) is None:
+                self.upsert(doc['guild_id'], doc['roblox_id'], doc)
+                if on_insert is not None:
+                    on_insert(doc['roblox_id'])
+        elif operation == 'delete':
+            key = self._keys_by_doc_id.pop(change['documentKey']['_id'], None)
+            if key is not None:
+                self.remove(*key)
+
+    async def _watch(self, reload: Callable[[], Awaitable[None]], on_insert: Optional[Callable[[str], None]], reload_interval: float):
+        # Status updates are this process's own business; only rows appearing or disappearing matter here
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "delete", "drop", "rename", "invalidate"]}}}]
+        while True:
+            try:
+                async with self.collection.watch(pipeline) as stream:
+                    # Reload after the stream is open so nothing written in between is missed
+                    await reload()
+                    async for change in stream:
+                        if change.get('operationType') in ('drop', 'rename', 'invalidate'):
+                            break
+                        self._apply_change(change, on_insert)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print(f"Tracked players change stream unavailable, polling instead: {e}")
+                try:
+                    await reload()
+                except PyMongoError as e:
+                    print(f"Failed to reload tracked players: {e}")
+                await asyncio.sleep(reload_interval)
+
+    def start(self, reload: Optional[Callable[[], Awaitable[None]]] = None, on_insert: Optional[Callable[[str], None]] = None, reload_interval: float = 300):
+        """Start following the collection; `reload` (default: load()) runs whenever a full read is needed."""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch(reload or self.load, on_insert, reload_interval))
+
+    def stop(self):
+        if self._watch_task and not self._watch_task.done():
+            self._watch_task.cancel()
+        self._watch_task = None
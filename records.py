@@ -0,0 +1,100 @@
+import json
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data):
+    # orjson decodes several times faster than the stdlib; fall back when it is not installed
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
+class Presence:
+    user_id: int
+    presence_type: int
+    last_location: str
+    place_id: Optional[int]
+    root_place_id: Optional[int]
+    game_id: Optional[str]
+    universe_id: Optional[int]
+    last_online: str
+
+    @property
+    def online(self) -> bool:
+        # 2 = InGame; 1 (website) and 3 (Studio) are not treated as online
+        return self.presence_type == 2
+
+
+@dataclass(slots=True)
+class UserInfo:
+    id: int
+    name: str
+    display_name: str
+    description: str
+    created: str
+    has_verified_badge: bool
+
+
+@dataclass(slots=True)
+class GameInfo:
+    universe_id: int
+    root_place_id: Optional[int]
+    name: str
+    icon_url: Optional[str]
+
+
+def parse_presence(raw: dict) -> Presence:
+    return Presence(
+        user_id=raw.get('userId'),
+        presence_type=raw.get('userPresenceType', 0),
+        last_location=raw.get('lastLocation') or '',
+        place_id=raw.get('placeId'),
+        root_place_id=raw.get('rootPlaceId'),
+        game_id=raw.get('gameId'),
+        universe_id=raw.get('universeId'),
+        last_online=raw.get('lastOnline') or ''
+    )
+
+
+def parse_user(raw: dict) -> UserInfo:
+    # The multi-user endpoint omits description/created; both shapes parse to the same record
+    return UserInfo(
+        id=raw.get('id'),
+        name=raw.get('name'),
+        display_name=raw.get('displayName'),
+        description=raw.get('description', ''),
+        created=raw.get('created', ''),
+        has_verified_badge=raw.get('hasVerifiedBadge', False)
+    )
+
+
+def parse_game(raw: dict, icon_url: Optional[str] = None) -> GameInfo:
+    return GameInfo(
+        universe_id=raw.get('id'),
+        root_place_id=raw.get('rootPlaceId'),
+        name=raw.get('name') or '',
+        icon_url=icon_url
+    )
+
+
+RECORD_TYPES = {'Presence': Presence, 'UserInfo': UserInfo, 'GameInfo': GameInfo}
+
+
+def to_document(data):
+    """Convert a cached value into something BSON can store."""
+    if type(data).__name__ in RECORD_TYPES:
+        return {'record': type(data).__name__, 'fields': asdict(data)}
+    return data
+
+
+def from_document(value):
+    if isinstance(value, dict) and value.get('record') in RECORD_TYPES:
+        return RECORD_TYPES[value['record']](**value['fields'])
+    return value
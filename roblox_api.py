@@ -1,21 +1,62 @@
 
 import aiohttp
 import asyncio
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Callable, Awaitable
 from datetime import datetime, timedelta
 import time
+from urllib.parse import urlparse
+
+from cache import TTLCache
+from rate_limiter import HostRateLimiter
+from circuit_breaker import CircuitBreaker, RetryBudget, backoff_delay
+from metrics import registry
+from tracing import tracer
+from records import GameInfo, Presence, UserInfo, json_loads, parse_game, parse_presence, parse_user
+
+request_latency = registry.histogram('roblox_request_duration_seconds', 'Roblox API request latency per attempt', ['host'])
+request_errors = registry.counter('roblox_request_errors_total', 'Failed Roblox API request attempts by kind', ['host', 'kind'])
 
 class RobloxAPI:
-    def __init__(self):
+    def __init__(self, base_urls: Optional[Dict[str, str]] = None):
         self.session: Optional[aiohttp.ClientSession] = None
-        self.cache: Dict[str, tuple] = {}
+        # Overridable so the API can be pointed at local stand-ins (see benchmarks/)
+        self.base_urls = {
+            'users': 'https://users.roblox.com',
+            'presence': 'https://presence.roblox.com',
+            'thumbnails': 'https://thumbnails.roblox.com',
+            'games': 'https://games.roblox.com',
+            **(base_urls or {})
+        }
         self.cache_ttl = {
             'user_info': 300,
             'avatar': 300,
-            'presence': 10
+            'presence': 10,
+            # Game names and icons rarely change, so they are kept far longer than per-user data
+            'game': 3600
+        }
+        self.cache_max_size = {
+            'user_info': 10000,
+            'avatar': 10000,
+            'presence': 10000,
+            'game': 5000
         }
-        self.rate_limit_delay = 0.15
-        self.last_request_time = 0
+        self.cache = TTLCache(self.cache_ttl, self.cache_max_size)
+        # Optional write-behind tier (e.g. MongoCacheStore) that survives restarts
+        self.persistent_store = None
+        # (requests per second, burst) per Roblox host
+        self.host_rate_limits = {
+            'users.roblox.com': (5, 10),
+            'presence.roblox.com': (5, 10),
+            'thumbnails.roblox.com': (5, 10),
+            'games.roblox.com': (5, 10)
+        }
+        self.rate_limiter = HostRateLimiter(self.host_rate_limits)
+        # host -> breaker; opens after consecutive failures so an outage fails fast
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        # Shared across every request; refills each window, or explicitly via start_cycle()
+        self.retry_budget = RetryBudget(retries_per_window=50, window=60)
+        # cache_key -> future shared by identical lookups that are already in flight
+        self.in_flight: Dict[str, asyncio.Future] = {}
         
     async def create_session(self):
         if self.session is None or self.session.closed:
@@ -25,101 +66,165 @@ class RobloxAPI:
                 timeout=timeout,
                 connector=connector
             )
+        self.cache.start_sweeper()
     
     async def close_session(self):
+        self.cache.stop_sweeper()
         if self.session and not self.session.closed:
             await self.session.close()
             await asyncio.sleep(0.1)
     
     def _get_cached(self, cache_key: str, cache_type: str) -> Optional[any]:
-        if cache_key in self.cache:
-            data, timestamp = self.cache[cache_key]
-            ttl = self.cache_ttl.get(cache_type, 60)
-            if time.time() - timestamp < ttl:
-                return data
-            else:
-                del self.cache[cache_key]
-        return None
+        with tracer.span('cache_lookup', 'cache', cache_type=cache_type, key=cache_key):
+            return self.cache.get(cache_key, cache_type)
+    
+    def _set_cache(self, cache_key: str, data: any, cache_type: str):
+        self.cache.set(cache_key, data, cache_type)
+        if self.persistent_store is not None:
+            self.persistent_store.record(cache_key, data, cache_type, self.cache_ttl.get(cache_type, 60))
     
-    def _set_cache(self, cache_key: str, data: any):
-        self.cache[cache_key] = (data, time.time())
+    async def warm_cache(self) -> int:
+        if self.persistent_store is None:
+            return 0
+        return await self.persistent_store.load(self.cache)
+    
+    def _start_in_flight(self, cache_key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[cache_key] = future
+        return future
+    
+    def _finish_in_flight(self, cache_key: str, result: any):
+        future = self.in_flight.pop(cache_key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+    
+    async def _coalesce(self, cache_key: str, fetch: Callable[[], Awaitable[any]]) -> any:
+        pending = self.in_flight.get(cache_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
         
-        if len(self.cache) > 1000:
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
+        self._start_in_flight(cache_key)
+        result = None
+        try:
+            result = await fetch()
+            return result
+        finally:
+            # Waiters get None if the owner failed or was cancelled, matching a failed lookup
+            self._finish_in_flight(cache_key, result)
+    
+    def _parse_retry_after(self, value: Optional[str], default: float) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
     
-    async def _rate_limit(self):
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_delay:
-            await asyncio.sleep(self.rate_limit_delay - time_since_last)
-        self.last_request_time = time.time()
+    def _breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self.circuit_breakers.get(host)
+        if breaker is None:
+            breaker = self.circuit_breakers[host] = CircuitBreaker()
+        return breaker
+    
+    def start_cycle(self):
+        self.retry_budget.reset()
+    
+    async def _retry_after_failure(self, attempt: int, max_retries: int) -> bool:
+        if attempt >= max_retries - 1 or not self.retry_budget.try_spend():
+            return False
+        delay = backoff_delay(attempt)
+        with tracer.span('retry_sleep', 'roblox', attempt=attempt, delay=delay):
+            await asyncio.sleep(delay)
+        return True
     
     async def _make_request(self, method: str, url: str, **kwargs) -> Optional[Dict]:
         await self.create_session()
-        await self._rate_limit()
+        bucket = self.rate_limiter.bucket_for(url)
+        host = urlparse(url).netloc
+        breaker = self._breaker_for(host)
         
         max_retries = 3
-        retry_delay = 1
         
         for attempt in range(max_retries):
+            if not breaker.allow():
+                request_errors.inc(host=host, kind='circuit_open')
+                return None
+            
             try:
-                async with self.session.request(method, url, **kwargs) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 429:
-                        retry_after = int(response.headers.get('Retry-After', retry_delay * (attempt + 1)))
-                        print(f"Rate limited, waiting {retry_after}s")
-                        await asyncio.sleep(retry_after)
-                        continue
-                    elif response.status >= 500:
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_delay * (attempt + 1))
-                            continue
-                    elif response.status == 400:
-                        print(f"Bad request to {url}: {await response.text()}")
+                # Inside the try: a cancelled wait must hand a half-open probe slot back
+                with tracer.span('rate_limit_wait', 'roblox', host=host):
+                    await bucket.acquire()
+                start = time.perf_counter()
+                with tracer.span('http', 'roblox', method=method, host=host, attempt=attempt) as span:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        span.annotate(status=response.status)
+                        request_latency.observe(time.perf_counter() - start, host=host)
+                        if response.status == 200:
+                            data = await response.json(loads=json_loads)
+                            bucket.on_success()
+                            breaker.record_success()
+                            return data
+                        elif response.status == 429:
+                            request_errors.inc(host=host, kind='429')
+                            # Rate limiting means the host is up; it does not count against the breaker
+                            breaker.record_success()
+                            retry_after = self._parse_retry_after(response.headers.get('Retry-After'), backoff_delay(attempt))
+                            print(f"Rate limited, waiting {retry_after}s")
+                            # The bucket holds every caller for this host until Retry-After has passed
+                            bucket.on_rate_limited(retry_after)
+                            if attempt < max_retries - 1 and self.retry_budget.try_spend():
+                                continue
+                            return None
+                        elif response.status >= 500:
+                            request_errors.inc(host=host, kind='5xx')
+                            breaker.record_failure()
+                            if await self._retry_after_failure(attempt, max_retries):
+                                continue
+                            return None
+                        breaker.record_success()
+                        if response.status == 400:
+                            print(f"Bad request to {url}: {await response.text()}")
                         return None
-                    return None
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
             except asyncio.TimeoutError:
+                request_errors.inc(host=host, kind='timeout')
+                breaker.record_failure()
                 print(f"Timeout on attempt {attempt + 1} for {url}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
+                if await self._retry_after_failure(attempt, max_retries):
                     continue
                 return None
             except aiohttp.ClientError as e:
+                request_errors.inc(host=host, kind='client_error')
+                breaker.record_failure()
                 print(f"Client error on attempt {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
+                if await self._retry_after_failure(attempt, max_retries):
                     continue
                 return None
             except Exception as e:
+                request_errors.inc(host=host, kind='other')
+                breaker.record_failure()
                 print(f"Request error on attempt {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
+                if await self._retry_after_failure(attempt, max_retries):
                     continue
                 return None
         
         return None
     
-    async def get_user_info(self, user_id: int) -> Optional[Dict]:
+    async def get_user_info(self, user_id: int) -> Optional[UserInfo]:
         cache_key = f"user_info_{user_id}"
         cached = self._get_cached(cache_key, 'user_info')
         if cached is not None:
             return cached
         
-        url = f"https://users.roblox.com/v1/users/{user_id}"
+        return await self._coalesce(cache_key, lambda: self._fetch_user_info(user_id, cache_key))
+    
+    async def _fetch_user_info(self, user_id: int, cache_key: str) -> Optional[UserInfo]:
+        url = f"{self.base_urls['users']}/v1/users/{user_id}"
         data = await self._make_request('GET', url)
         
         if data:
-            result = {
-                'id': data.get('id'),
-                'name': data.get('name'),
-                'displayName': data.get('displayName'),
-                'description': data.get('description', ''),
-                'created': data.get('created', ''),
-                'hasVerifiedBadge': data.get('hasVerifiedBadge', False)
-            }
-            self._set_cache(cache_key, result)
+            result = parse_user(data)
+            self._set_cache(cache_key, result, 'user_info')
             return result
         return None
     
@@ -129,41 +234,64 @@ class RobloxAPI:
         if cached is not None:
             return cached
         
-        url = f"https://thumbnails.roblox.com/v1/users/avatar?userIds={user_id}&size=420x420&format=Png&isCircular=false"
+        return await self._coalesce(cache_key, lambda: self._fetch_user_avatar_url(user_id, cache_key))
+    
+    async def _fetch_user_avatar_url(self, user_id: int, cache_key: str) -> Optional[str]:
+        url = f"{self.base_urls['thumbnails']}/v1/users/avatar?userIds={user_id}&size=420x420&format=Png&isCircular=false"
         data = await self._make_request('GET', url)
         
         if data and data.get('data') and len(data['data']) > 0:
             avatar_url = data['data'][0].get('imageUrl')
-            self._set_cache(cache_key, avatar_url)
+            self._set_cache(cache_key, avatar_url, 'avatar')
             return avatar_url
         return None
     
-    async def get_user_presence(self, user_id: int) -> Optional[Dict]:
+    async def get_user_presence(self, user_id: int) -> Optional[Presence]:
         cache_key = f"presence_{user_id}"
         cached = self._get_cached(cache_key, 'presence')
         if cached is not None:
             return cached
         
-        url = "https://presence.roblox.com/v1/presence/users"
+        return await self._coalesce(cache_key, lambda: self._fetch_user_presence(user_id, cache_key))
+    
+    async def _fetch_user_presence(self, user_id: int, cache_key: str) -> Optional[Presence]:
+        url = f"{self.base_urls['presence']}/v1/presence/users"
         payload = {"userIds": [user_id]}
         data = await self._make_request('POST', url, json=payload)
         
         if data and data.get('userPresences') and len(data['userPresences']) > 0:
             presence = data['userPresences'][0]
-            result = {
-                'userPresenceType': presence.get('userPresenceType', 0),
-                'lastLocation': presence.get('lastLocation', ''),
-                'placeId': presence.get('placeId'),
-                'rootPlaceId': presence.get('rootPlaceId'),
-                'gameId': presence.get('gameId'),
-                'universeId': presence.get('universeId'),
-                'userId': presence.get('userId'),
-                'lastOnline': presence.get('lastOnline', '')
-            }
-            self._set_cache(cache_key, result)
+            result = parse_presence(presence)
+            self._set_cache(cache_key, result, 'presence')
             return result
         return None
     
+    def build_player_status(self, presence: Optional[Presence], user_info: Optional[UserInfo], game_info: Optional[GameInfo] = None) -> Dict:
+        # Records are shared with the cache, not copied
+        if presence is None:
+            return {
+                'online': False,
+                'status': 'Offline',
+                'user_info': user_info
+            }
+
+        if presence.online:
+            return {
+                'online': True,
+                'status': 'Online',
+                'game': game_info.name if game_info and game_info.name else presence.last_location or 'Playing',
+                'game_info': game_info,
+                'user_info': user_info,
+                'presence': presence
+            }
+        else:
+            return {
+                'online': False,
+                'status': 'Offline',
+                'user_info': user_info,
+                'presence': presence
+            }
+
     async def get_player_status(self, user_id: int) -> Dict:
         try:
             presence_task = asyncio.create_task(self.get_user_presence(user_id))
@@ -179,44 +307,19 @@ class RobloxAPI:
                 print(f"Error getting user info for {user_id}: {user_info}")
                 user_info = None
 
-            if not presence or not user_info:
-                return {
-                    'online': False,
-                    'status': 'Offline',
-                    'user_info': user_info if user_info else {}
-                }
-
-            presence_type = presence.get('userPresenceType', 0)
+            if not user_info:
+                return self.build_player_status(None, None)
 
-            if presence_type == 2:
-                game_location = presence.get('lastLocation', 'Playing')
-                return {
-                    'online': True,
-                    'status': 'Online',
-                    'game': game_location,
-                    'user_info': user_info,
-                    'presence': presence
-                }
-            else:
-                return {
-                    'online': False,
-                    'status': 'Offline',
-                    'user_info': user_info,
-                    'presence': presence
-                }
+            return self.build_player_status(presence, user_info)
         except Exception as e:
             print(f"Unexpected error in get_player_status for {user_id}: {e}")
-            return {
-                'online': False,
-                'status': 'Offline',
-                'user_info': {}
-            }
+            return self.build_player_status(None, None)
     
-    async def get_multiple_user_presences(self, user_ids: List[int]) -> Dict[int, Optional[Dict]]:
+    async def get_multiple_user_presences(self, user_ids: List[int]) -> Dict[int, Optional[Presence]]:
         if not user_ids:
             return {}
         
-        url = "https://presence.roblox.com/v1/presence/users"
+        url = f"{self.base_urls['presence']}/v1/presence/users"
         
         results = {}
         batch_size = 50
@@ -225,42 +328,229 @@ class RobloxAPI:
             batch = user_ids[i:i + batch_size]
             
             uncached_ids = []
+            pending = {}
             for user_id in batch:
                 cache_key = f"presence_{user_id}"
                 cached = self._get_cached(cache_key, 'presence')
                 if cached is not None:
                     results[user_id] = cached
+                elif cache_key in self.in_flight:
+                    pending[user_id] = self.in_flight[cache_key]
                 else:
                     uncached_ids.append(user_id)
+                    self._start_in_flight(cache_key)
             
             if uncached_ids:
-                payload = {"userIds": uncached_ids}
-                data = await self._make_request('POST', url, json=payload)
+                try:
+                    payload = {"userIds": uncached_ids}
+                    data = await self._make_request('POST', url, json=payload)
                 
-                if data and data.get('userPresences'):
-                    for presence in data['userPresences']:
-                        user_id = presence.get('userId')
-                        if user_id:
-                            result = {
-                                'userPresenceType': presence.get('userPresenceType', 0),
-                                'lastLocation': presence.get('lastLocation', ''),
-                                'placeId': presence.get('placeId'),
-                                'rootPlaceId': presence.get('rootPlaceId'),
-                                'gameId': presence.get('gameId'),
-                                'universeId': presence.get('universeId'),
-                                'userId': presence.get('userId'),
-                                'lastOnline': presence.get('lastOnline', '')
-                            }
-                            cache_key = f"presence_{user_id}"
-                            self._set_cache(cache_key, result)
-                            results[user_id] = result
+                    if data and data.get('userPresences'):
+                        for presence in data['userPresences']:
+                            user_id = presence.get('userId')
+                            if user_id:
+                                result = parse_presence(presence)
+                                cache_key = f"presence_{user_id}"
+                                self._set_cache(cache_key, result, 'presence')
+                                results[user_id] = result
+                finally:
+                    for user_id in uncached_ids:
+                        self._finish_in_flight(f"presence_{user_id}", results.get(user_id))
+            
+            for user_id, future in pending.items():
+                result = await asyncio.shield(future)
+                if result is not None:
+                    results[user_id] = result
+        
+        return results
+    
+    async def get_multiple_user_infos(self, user_ids: List[int]) -> Dict[int, Optional[UserInfo]]:
+        # None means the user does not exist; ids whose lookup failed are left out
+        if not user_ids:
+            return {}
+        
+        url = f"{self.base_urls['users']}/v1/users"
+        
+        results = {}
+        batch_size = 100
+        
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i:i + batch_size]
+            
+            uncached_ids = []
+            pending = {}
+            for user_id in batch:
+                cache_key = f"user_info_{user_id}"
+                cached = self._get_cached(cache_key, 'user_info')
+                if cached is not None:
+                    results[user_id] = cached
+                elif cache_key in self.in_flight:
+                    pending[user_id] = self.in_flight[cache_key]
+                else:
+                    uncached_ids.append(user_id)
+                    self._start_in_flight(cache_key)
+            
+            if uncached_ids:
+                try:
+                    payload = {"userIds": uncached_ids, "excludeBannedUsers": False}
+                    data = await self._make_request('POST', url, json=payload)
+                
+                    if data is not None:
+                        for user in data.get('data') or []:
+                            user_id = user.get('id')
+                            if user_id:
+                                result = parse_user(user)
+                                cache_key = f"user_info_{user_id}"
+                                self._set_cache(cache_key, result, 'user_info')
+                                results[user_id] = result
+                        # The lookup succeeded, so users it did not return do not exist
+                        for user_id in uncached_ids:
+                            results.setdefault(user_id, None)
+                finally:
+                    for user_id in uncached_ids:
+                        self._finish_in_flight(f"user_info_{user_id}", results.get(user_id))
+            
+            for user_id, future in pending.items():
+                result = await asyncio.shield(future)
+                if result is not None:
+                    results[user_id] = result
+        
+        return results
+    
+    async def get_users_by_usernames(self, usernames: List[str]) -> Dict[str, Optional[UserInfo]]:
+        # Keyed by lowercased username. None means no such user; names whose lookup failed are left out
+        if not usernames:
+            return {}
+        
+        url = f"{self.base_urls['users']}/v1/usernames/users"
+        
+        results = {}
+        batch_size = 100
+        
+        for i in range(0, len(usernames), batch_size):
+            batch = usernames[i:i + batch_size]
+            payload = {"usernames": batch, "excludeBannedUsers": False}
+            data = await self._make_request('POST', url, json=payload)
+            
+            if data is not None:
+                for user in data.get('data') or []:
+                    if user.get('id') and user.get('requestedUsername'):
+                        result = parse_user(user)
+                        # Seeds the user info cache so the same users are not looked up again by id
+                        self._set_cache(f"user_info_{result.id}", result, 'user_info')
+                        results[user['requestedUsername'].lower()] = result
+                for username in batch:
+                    results.setdefault(username.lower(), None)
+        
+        return results
+    
+    async def get_multiple_avatar_urls(self, user_ids: List[int]) -> Dict[int, Optional[str]]:
+        if not user_ids:
+            return {}
+        
+        results = {}
+        batch_size = 100
+        
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i:i + batch_size]
+            
+            uncached_ids = []
+            pending = {}
+            for user_id in batch:
+                cache_key = f"avatar_{user_id}"
+                cached = self._get_cached(cache_key, 'avatar')
+                if cached is not None:
+                    results[user_id] = cached
+                elif cache_key in self.in_flight:
+                    pending[user_id] = self.in_flight[cache_key]
+                else:
+                    uncached_ids.append(user_id)
+                    self._start_in_flight(cache_key)
+            
+            if uncached_ids:
+                try:
+                    ids_param = ",".join(str(user_id) for user_id in uncached_ids)
+                    url = f"{self.base_urls['thumbnails']}/v1/users/avatar?userIds={ids_param}&size=420x420&format=Png&isCircular=false"
+                    data = await self._make_request('GET', url)
+                
+                    if data and data.get('data'):
+                        for thumbnail in data['data']:
+                            user_id = thumbnail.get('targetId')
+                            avatar_url = thumbnail.get('imageUrl')
+                            if user_id and avatar_url:
+                                cache_key = f"avatar_{user_id}"
+                                self._set_cache(cache_key, avatar_url, 'avatar')
+                                results[user_id] = avatar_url
+                finally:
+                    for user_id in uncached_ids:
+                        self._finish_in_flight(f"avatar_{user_id}", results.get(user_id))
+            
+            for user_id, future in pending.items():
+                result = await asyncio.shield(future)
+                if result is not None:
+                    results[user_id] = result
+        
+        return results
+    
+    async def get_multiple_game_infos(self, universe_ids: List[int]) -> Dict[int, Optional[GameInfo]]:
+        # Names and icons come from two endpoints but are cached together as one record per universe
+        universe_ids = list(dict.fromkeys(universe_ids))
+        if not universe_ids:
+            return {}
+        
+        results = {}
+        batch_size = 50
+        
+        for i in range(0, len(universe_ids), batch_size):
+            batch = universe_ids[i:i + batch_size]
+            
+            uncached_ids = []
+            pending = {}
+            for universe_id in batch:
+                cache_key = f"game_{universe_id}"
+                cached = self._get_cached(cache_key, 'game')
+                if cached is not None:
+                    results[universe_id] = cached
+                elif cache_key in self.in_flight:
+                    pending[universe_id] = self.in_flight[cache_key]
+                else:
+                    uncached_ids.append(universe_id)
+                    self._start_in_flight(cache_key)
+            
+            if uncached_ids:
+                try:
+                    ids_param = ",".join(str(universe_id) for universe_id in uncached_ids)
+                    games, icons = await asyncio.gather(
+                        self._make_request('GET', f"{self.base_urls['games']}/v1/games?universeIds={ids_param}"),
+                        self._make_request('GET', f"{self.base_urls['thumbnails']}/v1/games/icons?universeIds={ids_param}&size=150x150&format=Png&isCircular=false")
+                    )
+                    
+                    icon_urls = {}
+                    if icons and icons.get('data'):
+                        for thumbnail in icons['data']:
+                            if thumbnail.get('targetId') and thumbnail.get('imageUrl'):
+                                icon_urls[thumbnail['targetId']] = thumbnail['imageUrl']
+                    
+                    if games and games.get('data'):
+                        for game in games['data']:
+                            universe_id = game.get('id')
+                            if universe_id:
+                                result = parse_game(game, icon_urls.get(universe_id))
+                                self._set_cache(f"game_{universe_id}", result, 'game')
+                                results[universe_id] = result
+                finally:
+                    for universe_id in uncached_ids:
+                        self._finish_in_flight(f"game_{universe_id}", results.get(universe_id))
+            
+            for universe_id, future in pending.items():
+                result = await asyncio.shield(future)
+                if result is not None:
+                    results[universe_id] = result
         
         return results
     
     def clear_cache(self, cache_type: Optional[str] = None):
-        if cache_type:
-            keys_to_delete = [k for k in self.cache.keys() if k.startswith(cache_type)]
-            for key in keys_to_delete:
-                del self.cache[key]
-        else:
-            self.cache.clear()
+        self.cache.clear(cache_type)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return self.cache.stats()
@@ -0,0 +1,138 @@
+import heapq
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class PollScheduler:
+    """Priority-queue scheduler that decides when each Roblox user is polled next.
+
+    Users who are online or changed status within `active_window` seconds are
+    polled every `min_interval` seconds; every quiet poll after that multiplies
+    the interval by `backoff`, up to `max_interval`. `pop_due` never hands out
+    more than `budget_per_second` users per second on average, so a burst of
+    due users is spread out instead of exceeding the upstream budget. Budgets
+    below one user per second still work: the allowance builds up to one
+    user before any is handed out.
+
+    Users are handed out in multiples of `batch_size` so each upstream
+    request stays full: users due within `lookahead` seconds are pulled
+    forward to fill a batch, and fewer than a batch are held back until the
+    oldest of them is `slack` seconds overdue.
+    """
+
+    def __init__(self, budget_per_second: float, min_interval: float = 10, max_interval: float = 600, active_window: float = 300, backoff: float = 2.0, batch_size: int = 1, lookahead: float = 0, slack: float = 0):
+        if budget_per_second <= 0:
+            raise ValueError(f"budget_per_second must be positive, got {budget_per_second}")
+        self.budget_per_second = budget_per_second
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.active_window = active_window
+        self.backoff = backoff
+        self.batch_size = max(1, batch_size)
+        self.lookahead = lookahead
+        self.slack = slack
+        # Heap of (due_at, roblox_id); an entry is stale if it no longer matches players[roblox_id]['due_at']
+        self._heap = []
+        self.players: Dict[str, dict] = {}
+        self._allowance = 0.0
+        self._allowance_updated = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, roblox_id: str) -> bool:
+        return roblox_id in self.players
+
+    def _schedule(self, roblox_id: str, due_at: float):
+        state = self.players[roblox_id]
+        if state['due_at'] == due_at:
+            # Already queued for exactly this time; a second entry would hand the user out twice
+            return
+        state['due_at'] = due_at
+        heapq.heappush(self._heap, (due_at, roblox_id))
+
+    def add(self, roblox_id: str, delay: float = 0, active: bool = True):
+        if roblox_id in self.players:
+            return
+        now = time.monotonic()
+        # Inactive users start outside the active window, so they back off after their first quiet poll
+        last_change = now if active else now - self.active_window
+        self.players[roblox_id] = {'interval': self.min_interval, 'last_change': last_change, 'due_at': None}
+        self._schedule(roblox_id, now + delay)
+
+    def remove(self, roblox_id: str):
+        # The heap entry is dropped lazily once it reaches the top
+        self.players.pop(roblox_id, None)
+
+    def sync(self, roblox_ids: Iterable[str]):
+        seen = set()
+        for roblox_id in roblox_ids:
+            seen.add(roblox_id)
+            # Spread newly discovered users over one interval instead of polling them all at once;
+            # nothing is known about them yet, so they do not start as active (e.g. after a restart)
+            self.add(roblox_id, delay=random.uniform(0, self.min_interval), active=False)
+        for roblox_id in list(self.players):
+            if roblox_id not in seen:
+                self.remove(roblox_id)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+
+        # Refill the budget, allowing at most one second of burst but always enough for one user
+        elapsed = now - self._allowance_updated
+        self._allowance = min(max(1.0, self.budget_per_second), self._allowance + elapsed * self.budget_per_second)
+        self._allowance_updated = now
+
+        # Candidates in due order: overdue users first, then ones due within the lookahead
+        candidates = []
+        seen = set()
+        limit = int(self._allowance)
+        while self._heap and len(candidates) < limit:
+            due_at, roblox_id = self._heap[0]
+            state = self.players.get(roblox_id)
+            if state is None or state['due_at'] != due_at or roblox_id in seen:
+                heapq.heappop(self._heap)
+                continue
+            if due_at > now + self.lookahead:
+                break
+            seen.add(roblox_id)
+            candidates.append(heapq.heappop(self._heap))
+
+        overdue = sum(1 for due_at, _ in candidates if due_at <= now)
+        if not overdue:
+            take = 0
+        elif len(candidates) >= self.batch_size:
+            # Whole batches only, but never leave an overdue user behind
+            take = max(overdue, len(candidates) - len(candidates) % self.batch_size)
+        elif now >= candidates[0][0] + self.slack:
+            take = len(candidates)
+        else:
+            # Hold a partial batch until it fills or its oldest user has waited `slack` seconds
+            take = 0
+
+        for entry in candidates[take:]:
+            heapq.heappush(self._heap, entry)
+
+        due = []
+        for due_at, roblox_id in candidates[:take]:
+            state = self.players[roblox_id]
+            due.append(roblox_id)
+            self._allowance -= 1
+            # Provisional reschedule so a failed lookup is retried after the current interval
+            self._schedule(roblox_id, now + state['interval'])
+        return due
+
+    def record(self, roblox_id: str, online: bool, changed: bool, now: Optional[float] = None):
+        state = self.players.get(roblox_id)
+        if state is None:
+            return
+        now = time.monotonic() if now is None else now
+
+        if changed:
+            state['last_change'] = now
+        if online or now - state['last_change'] < self.active_window:
+            state['interval'] = self.min_interval
+        else:
+            state['interval'] = min(self.max_interval, state['interval'] * self.backoff)
+        self._schedule(roblox_id, now + state['interval'])
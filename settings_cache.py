@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+
+class GuildSettingsCache:
+    """In-memory copy of the guild_settings collection.
+
+    Loaded once, updated directly by the commands that write settings, and
+    kept in sync with writes from other processes through a change stream.
+    If change streams are unavailable (e.g. a standalone mongod) the cache
+    falls back to reloading the collection every `reload_interval` seconds.
+    """
+
+    def __init__(self, collection, reload_interval: float = 60):
+        self.collection = collection
+        self.reload_interval = reload_interval
+        self.settings: Dict[str, dict] = {}
+        # Change stream deletes only carry _id, so remember which guild each document belongs to
+        self._guild_ids_by_doc_id: Dict[object, str] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        settings = {}
+        guild_ids_by_doc_id = {}
+        async for doc in self.collection.find({}):
+            settings[doc['guild_id']] = doc
+            guild_ids_by_doc_id[doc['_id']] = doc['guild_id']
+        self.settings = settings
+        self._guild_ids_by_doc_id = guild_ids_by_doc_id
+        self._loaded = True
+
+    async def ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if not self._loaded:
+                await self.load()
+
+    async def get(self, guild_id: str) -> Optional[dict]:
+        await self.ensure_loaded()
+        return self.settings.get(guild_id)
+
+    def update(self, guild_id: str, fields: dict):
+        self.settings.setdefault(guild_id, {'guild_id': guild_id}).update(fields)
+
+    def _apply_change(self, change: dict):
+        operation = change.get('operationType')
+        if operation in ('insert', 'update', 'replace'):
+            doc = change.get('fullDocument')
+            if doc and doc.get('guild_id'):
+                self.settings[doc['guild_id']] = doc
+                self._guild_ids_by_doc_id[doc['_id']] = doc['guild_id']
+        elif operation == 'delete':
+            guild_id = self._guild_ids_by_doc_id.pop(change['documentKey']['_id'], None)
+            if guild_id:
+                self.settings.pop(guild_id, None)
+
+    async def _watch(self):
+        while True:
+            try:
+                async with self.collection.watch(full_document='updateLookup') as stream:
+                    # Reload after the stream is open so nothing written in between is missed
+                    await self.load()
+                    async for change in stream:
+                        if change.get('operationType') in ('drop', 'rename', 'invalidate'):
+                            break
+                        self._apply_change(change)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print(f"Guild settings change stream unavailable, polling instead: {e}")
+                await asyncio.sleep(self.reload_interval)
+                try:
+                    await self.load()
+                except PyMongoError as e:
+                    print(f"Failed to reload guild settings: {e}")
+
+    def start(self):
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    def stop(self):
+        if self._watch_task and not self._watch_task.done():
+            self._watch_task.cancel()
+        self._watch_task = None
@@ -0,0 +1,162 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Set
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring; each node is placed at `replicas` virtual points."""
+
+    def __init__(self, nodes: List[str], replicas: int = 64):
+        self.points = sorted((_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas))
+        self.keys = [point for point, _ in self.points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self.points:
+            return None
+        index = bisect.bisect(self.keys, _hash(key)) % len(self.points)
+        return self.points[index][1]
+
+
+class ShardCoordinator:
+    """Splits the poll workload across processes using leases in a Mongo collection.
+
+    roblox_ids hash into `num_slots` slots. Live nodes (those with an unexpired
+    node lease) are placed on a HashRing that decides which node *should* own
+    each slot, but a node only polls a slot once it holds that slot's lease.
+    Leases are taken with a conditional upsert, so at most one node holds a
+    slot at a time; a node releases slots it should no longer own before the
+    new owner can take them, and a crashed node's slots fail over once its
+    leases expire. Assumes node clocks are roughly in sync (within a few
+    seconds of `lease_ttl`).
+
+    `on_acquire` is awaited with newly leased slots before they count as
+    owned, so per-player state another node may have changed can be
+    re-read first; if it fails the slots are retried on the next rebalance.
+    """
+
+    def __init__(self, collection, node_id: str, num_slots: int = 256, lease_ttl: float = 30, on_change: Optional[Callable[[], Awaitable[None]]] = None, on_acquire: Optional[Callable[[Set[int]], Awaitable[None]]] = None):
+        self.collection = collection
+        self.node_id = node_id
+        self.num_slots = num_slots
+        self.lease_ttl = lease_ttl
+        self.on_change = on_change
+        self.on_acquire = on_acquire
+        self.owned_slots: Set[int] = set()
+        # Local deadline after which our leases may have lapsed; owns() goes False rather than risk double polling
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def slot_for(self, roblox_id: str) -> int:
+        return _hash(str(roblox_id)) % self.num_slots
+
+    def leases_valid(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def owns(self, roblox_id: str) -> bool:
+        return self.leases_valid() and self.slot_for(roblox_id) in self.owned_slots
+
+    async def ensure_indexes(self):
+        # Expired leases are never read as live; the TTL index only keeps the collection small
+        await self.collection.create_index("expires_at", expireAfterSeconds=300, name="expires_at_ttl")
+
+    async def _live_nodes(self, now: datetime) -> List[str]:
+        cursor = self.collection.find({"kind": "node", "expires_at": {"$gt": now}}, projection={"_id": 1})
+        return [doc['_id'][len("node:"):] async for doc in cursor]
+
+    async def _try_acquire(self, slot: int, now: datetime) -> bool:
+        try:
+            await self.collection.update_one(
+                {"_id": f"slot:{slot}", "$or": [{"owner": self.node_id}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"kind": "slot", "owner": self.node_id, "expires_at": now + timedelta(seconds=self.lease_ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The slot exists and another node still holds it
+            return False
+
+    async def rebalance(self):
+        renewal_started = time.monotonic()
+        was_valid = self.leases_valid()
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.lease_ttl)
+
+        await self.collection.update_one(
+            {"_id": f"node:{self.node_id}"},
+            {"$set": {"kind": "node", "expires_at": expires_at}},
+            upsert=True
+        )
+
+        ring = HashRing(await self._live_nodes(now))
+        desired = {slot for slot in range(self.num_slots) if ring.owner(f"slot:{slot}") == self.node_id}
+        previous = set(self.owned_slots)
+
+        # Stop polling released slots before giving up their leases
+        released = self.owned_slots - desired
+        self.owned_slots -= released
+        if released:
+            await self.collection.update_many(
+                {"_id": {"$in": [f"slot:{slot}" for slot in released]}, "owner": self.node_id},
+                {"$set": {"expires_at": now}}
+            )
+
+        if self.owned_slots:
+            await self.collection.update_many(
+                {"_id": {"$in": [f"slot:{slot}" for slot in self.owned_slots]}, "owner": self.node_id},
+                {"$set": {"expires_at": expires_at}}
+            )
+            # Keep only the slots whose lease is still ours (e.g. not lost during a long pause)
+            cursor = self.collection.find({"_id": {"$in": [f"slot:{slot}" for slot in self.owned_slots]}, "owner": self.node_id}, projection={"_id": 1})
+            self.owned_slots = {int(doc['_id'][len("slot:"):]) async for doc in cursor}
+
+        acquired = set()
+        for slot in desired - self.owned_slots:
+            if await self._try_acquire(slot, now):
+                acquired.add(slot)
+        if acquired and self.on_acquire is not None:
+            try:
+                await self.on_acquire(acquired)
+            except PyMongoError as e:
+                # Still leased to us, so the next rebalance takes them again and retries
+                print(f"Failed to prepare acquired slots: {e}")
+                acquired = set()
+        self.owned_slots |= acquired
+
+        self._valid_until = renewal_started + self.lease_ttl
+
+        if self.owned_slots != previous or not was_valid:
+            # Also after a lapse: owns() was False meanwhile, so callers may have dropped work they still own
+            print(f"Shard {self.node_id} now owns {len(self.owned_slots)}/{self.num_slots} slots", flush=True)
+            if self.on_change is not None:
+                await self.on_change()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self.rebalance()
+            except PyMongoError as e:
+                print(f"Shard lease renewal failed: {e}")
+
+    async def start(self):
+        await self.ensure_indexes()
+        await self.rebalance()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self.owned_slots = set()
+        await self.collection.update_many({"owner": self.node_id}, {"$set": {"expires_at": datetime.now(timezone.utc)}})
+        await self.collection.delete_one({"_id": f"node:{self.node_id}"})
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import time
+from typing import List, Optional
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def annotate(self, **args):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def annotate(self, **args):
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    """Opt-in recorder of timed spans for the poll loop.
+
+    Spans are buffered in memory and written once per cycle as Chrome trace
+    events in the JSON array format, one event per line. A file opens directly
+    in Perfetto or chrome://tracing, and stripping each line's trailing comma
+    gives JSONL for offline analysis. Each asyncio task gets its own track,
+    so concurrent work shows side by side. Files rotate once they pass `max_bytes`, keeping `backups` old files.
+
+    While disabled, `span()` returns a shared no-op context manager and
+    nothing is recorded.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.max_bytes = 0
+        self.backups = 0
+        self.cycle = 0
+        self.events: List[dict] = []
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def configure(self, path: Optional[str], max_bytes: int = 50_000_000, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = bool(path)
+
+    def span(self, name: str, category: str = 'poll', **args):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, category, args)
+
+    def _record(self, name: str, category: str, start: int, end: int, args: dict):
+        task = asyncio.current_task()
+        args['cycle'] = self.cycle
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self._origin) // 1000,
+            'dur': (end - start) // 1000,
+            'pid': self._pid,
+            'tid': id(task) if task is not None else 0,
+            'args': args
+        })
+
+    def start_cycle(self):
+        if self.enabled:
+            self.cycle += 1
+
+    async def end_cycle(self):
+        if not self.enabled or not self.events:
+            return
+        events, self.events = self.events, []
+        try:
+            await asyncio.to_thread(self._write, events)
+        except OSError as e:
+            print(f"Failed to write trace: {e}")
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write(self, events: List[dict]):
+        # Rotation only happens between cycles, so a cycle never spans two files
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        new_file = not os.path.exists(self.path)
+        with open(self.path, 'a') as f:
+            if new_file:
+                # The closing bracket is optional in the Chrome trace array format, so the file stays appendable
+                f.write('[\n')
+            f.writelines(json.dumps(event, separators=(',', ':')) + ',\n' for event in events)
+
+
+tracer = Tracer()
@@ -0,0 +1,46 @@
+from typing import Dict, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+class TrackedPlayerWriteBuffer:
+    """Write-behind buffer for tracked_players field updates.
+
+    Updates are merged per (guild_id, roblox_id) and flushed as a single
+    unordered bulk_write, so a cycle costs one round trip no matter how many
+    players changed.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.pending: Dict[Tuple[str, str], dict] = {}
+
+    def set(self, guild_id: str, roblox_id: str, fields: dict):
+        self.pending.setdefault((guild_id, roblox_id), {}).update(fields)
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+
+        pending, self.pending = self.pending, {}
+        operations = [
+            UpdateOne({"guild_id": guild_id, "roblox_id": roblox_id}, {"$set": fields})
+            for (guild_id, roblox_id), fields in pending.items()
+        ]
+
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            return result.modified_count
+        except BulkWriteError as e:
+            print(f"Bulk write of tracked players partially failed: {e.details.get('writeErrors')}")
+            return e.details.get('nModified', 0)
+        except PyMongoError as e:
+            print(f"Failed to flush tracked player updates, retrying next cycle: {e}")
+            # Re-queue without overwriting anything buffered since the flush started
+            for key, fields in pending.items():
+                self.pending[key] = {**fields, **self.pending.get(key, {})}
+            return 0